@@ -1,15 +1,37 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.response_cache import cached_json
 from db.session import get_db
 from schemas.dashboard import DashboardResponse, DashboardPatient
-from services.dashboard_service import fetch_dashboard
+from services.dashboard_service import fetch_dashboard, decode_cursor
+from services.summary_service import dashboard_version
 
 router = APIRouter(tags=["Dashboard"])
 
 @router.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard(db: AsyncSession = Depends(get_db)):
-    rows = await fetch_dashboard(db)
+async def get_dashboard(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Any summary write bumps the version, so every page's ETag changes
+    version = await dashboard_version(db)
+    return await cached_json(
+        request, "dashboard", f"{limit}:{cursor or ''}", version,
+        lambda: _dashboard_page(db, limit, cursor),
+    )
+
+
+async def _dashboard_page(db, limit, cursor):
+    rows, next_cursor = await fetch_dashboard(db, limit=limit, cursor=cursor)
 
     patients = [
         DashboardPatient(
@@ -23,4 +45,4 @@ async def get_dashboard(db: AsyncSession = Depends(get_db)):
         for row in rows
     ]
 
-    return DashboardResponse(patients=patients)
+    return DashboardResponse(patients=patients, next_cursor=next_cursor)
@@ -1,30 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from uuid import UUID
 
+from core.response_cache import cached_json
 from db.session import get_db
 from models.image import Image
 from models.finding import Finding
+from services.summary_service import study_version
 
 router = APIRouter(tags=["Findings"])
 
 @router.get("/studies/{study_id}/findings-view")
 async def findings_summary(
     study_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
+    # Polled by the viewer: one PK lookup decides between 304, the cached
+    # body and a rebuild (studies.version moves when findings are written)
+    version = await study_version(db, study_id)
+    return await cached_json(
+        request, "findings-view", str(study_id), version,
+        lambda: _findings_view(db, study_id),
+    )
+
+
+async def _findings_view(db, study_id):
     stmt = (
         select(
             Image.id,
             Image.file_path,
+            Finding.lesion_index,
             Finding.artery,
             Finding.blockage_pct,
             Finding.confidence,
             Finding.heatmap_path,
+            Finding.diameter_profile,
+            Finding.geometry.isnot(None).label("has_geometry"),
         )
         .join(Finding, Finding.image_id == Image.id)
         .where(Image.study_id == study_id)
+        .order_by(Image.id, Finding.lesion_index)
     )
 
     rows = (await db.execute(stmt)).all()
@@ -34,14 +51,34 @@ async def findings_summary(
         "images": [
             {
                 "image_id": str(r.id),
+                "lesion_index": r.lesion_index,
                 "artery": r.artery,
                 "blockage_pct": r.blockage_pct,
                 "confidence": r.confidence,
 
                 # 👇 THIS is the key part
-                "image_path": f"/{r.file_path}",
-                "heatmap_path": f"/{r.heatmap_path}" if r.heatmap_path else None,
+                # Served by api/images.py: the grid loads thumbnails,
+                # the viewer previews, "full" only on demand
+                "image_path": f"/images/{r.id}/full",
+                "image_preview_path": f"/images/{r.id}/preview",
+                "image_thumbnail_path": f"/images/{r.id}/thumb",
+                # Whole image with every lesion, and this lesion alone
+                "heatmap_path": _overlay_path(r, "preview"),
+                "heatmap_thumbnail_path": _overlay_path(r, "thumb"),
+                "overlay_path": _overlay_path(r, "preview", r.lesion_index),
+                "overlay_thumbnail_path": _overlay_path(r, "thumb", r.lesion_index),
+                "diameter_profile": r.diameter_profile,
             }
             for r in rows
         ],
     }
+
+
+def _overlay_path(r, size, lesion=None):
+    # New findings are drawn on request from stored geometry;
+    # older ones serve the image rendered during inference
+    if not (r.has_geometry or r.heatmap_path):
+        return None
+    if lesion is None:
+        return f"/images/{r.id}/overlay?size={size}"
+    return f"/images/{r.id}/overlay?lesion={lesion}&size={size}"
@@ -0,0 +1,99 @@
+import asyncio
+from email.utils import formatdate
+from typing import Literal, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import profiling
+from core.config import settings
+from core.response_cache import not_modified
+from db.session import get_db
+from models.image import Image
+from services.image_service import media_type, pyramid_level
+from services.overlay_service import legacy_heatmap, render_overlay
+
+router = APIRouter(tags=["Images"])
+
+Level = Literal["thumb", "preview", "full"]
+
+
+# Overlays are drawn from findings a re-run can replace under the same
+# URL, so clients revalidate them (a 304 is one geometry query)
+REVALIDATE = "private, no-cache"
+
+
+def _cache_headers(etag, last_modified=None, cache_control=None):
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": cache_control or f"private, max-age={settings.IMAGE_CACHE_MAX_AGE}",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+async def _serve_file(request: Request, source, level, content_hash=None, cache_control=None):
+    try:
+        path, key = await asyncio.to_thread(profiling.bind(pyramid_level), source, level, content_hash)
+        stat = await asyncio.to_thread(path.stat)
+    except (OSError, ValueError):
+        raise HTTPException(status_code=404, detail="Image unavailable")
+
+    headers = _cache_headers(f"{key}-{level}", stat.st_mtime, cache_control)
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse streams from disk and answers Range / If-Range itself
+    return FileResponse(
+        path, media_type=media_type(path), headers=headers, stat_result=stat
+    )
+
+
+@router.get("/images/{image_id}/overlay")
+async def image_overlay(
+    image_id: UUID,
+    request: Request,
+    lesion: Optional[int] = None,
+    size: Level = "preview",
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        rendered = await render_overlay(db, image_id, lesion, size)
+    except (OSError, ValueError):
+        raise HTTPException(status_code=404, detail="Source image unavailable")
+
+    if rendered is None:
+        heatmap = await legacy_heatmap(db, image_id, lesion)
+        if heatmap is None:
+            raise HTTPException(status_code=404, detail="No overlay for this image")
+        return await _serve_file(request, heatmap, size, cache_control=REVALIDATE)
+
+    data, media, etag = rendered
+    headers = _cache_headers(etag, cache_control=REVALIDATE)
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=data, media_type=media, headers=headers)
+
+
+@router.get("/images/{image_id}/{level}")
+async def image_file(
+    image_id: UUID,
+    level: Level,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    row = (
+        await db.execute(
+            select(Image.file_path, Image.content_hash).where(Image.id == image_id)
+        )
+    ).first()
+
+    if row is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return await _serve_file(request, row.file_path, level, row.content_hash)
@@ -4,11 +4,11 @@ from uuid import UUID
 
 from db.session import get_db
 from models.study import Study
-from services.inference_service import run_inference_for_study
+from services.job_service import enqueue_inference, QueueFullError
 
 router = APIRouter(tags=["Inference"])
 
-@router.post("/studies/{study_id}/run-inference")
+@router.post("/studies/{study_id}/run-inference", status_code=202)
 async def run_inference(
     study_id: UUID,
     db: AsyncSession = Depends(get_db),
@@ -17,9 +17,17 @@ async def run_inference(
     if not study:
         raise HTTPException(status_code=404, detail="Study not found")
 
-    await run_inference_for_study(db, study_id)
+    try:
+        job = await enqueue_inference(study_id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": "30"},
+        )
 
     return {
         "study_id": str(study_id),
-        "status": "inference completed",
+        "job_id": job["job_id"],
+        "status": job["status"],
     }
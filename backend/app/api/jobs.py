@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException
+
+from services.job_service import get_job, job_progress
+
+router = APIRouter(tags=["Jobs"])
+
+@router.get("/jobs/{job_id}")
+async def fetch_job(job_id: str):
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "job_id": job["job_id"],
+        "study_id": job["study_id"],
+        "status": job["status"],   # queued | running | completed | failed
+        "progress": job_progress(job),
+        "images": job["images"],   # image_id -> pending | running | done | reused | no_detection | failed
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "profile_id": job["profile_id"],  # file under PROFILE_DIR when profiled
+    }
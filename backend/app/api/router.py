@@ -1,12 +1,14 @@
 # app/api/router.py
 from fastapi import APIRouter
-from api import dashboard, upload, inference, findings, decision, report, patient
+from api import dashboard, upload, inference, findings, images, decision, report, patient, jobs
 
 router = APIRouter()
 router.include_router(patient.router)
 router.include_router(dashboard.router)
 router.include_router(upload.router)
 router.include_router(inference.router)
+router.include_router(jobs.router)
 router.include_router(findings.router)
+router.include_router(images.router)
 router.include_router(decision.router)
 router.include_router(report.router)
\ No newline at end of file
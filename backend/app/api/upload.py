@@ -1,12 +1,15 @@
 from fastapi import APIRouter, UploadFile, File, Query, Depends, HTTPException
 from typing import List
-from pathlib import Path
 import uuid
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.session import get_db
 from models.patient import Patient
-from services.upload_service import create_study_and_images
+from services.upload_service import (
+    create_study_and_images,
+    store_upload,
+    UploadTooLargeError,
+)
 from core.config import settings
 
 router = APIRouter(tags=["Upload"])
@@ -22,23 +25,28 @@ async def upload_dicom_batch(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    # 2️⃣ Save files to disk
-    patient_dir = Path(settings.DICOM_STORAGE_PATH) / patient_id
-    patient_dir.mkdir(parents=True, exist_ok=True)
-
-    file_paths = []
-    for file in files:
-        file_path = patient_dir / f"{uuid.uuid4()}_{file.filename}"
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-        file_paths.append(str(file_path))
+    # 2️⃣ Stream files into the content-addressed store
+    #     (constant memory, off the event loop, identical files stored once)
+    stored_files = []
+    batch_remaining = settings.UPLOAD_MAX_BATCH_BYTES
+    try:
+        for file in files:
+            stored = await store_upload(
+                file,
+                max_bytes=min(settings.UPLOAD_MAX_FILE_BYTES, batch_remaining),
+            )
+            batch_remaining -= stored["size"]
+            stored_files.append(stored)
+    except UploadTooLargeError as e:
+        # Blobs already stored stay: a concurrent upload of the same content
+        # may reference them. Unreferenced ones are removed by services.blob_gc
+        raise HTTPException(status_code=413, detail=str(e))
 
     # 3️⃣ Persist study + images in DB
     study, images = await create_study_and_images(
         db=db,
         patient_id=patient.id,
-        file_paths=file_paths,
+        stored_files=stored_files,
     )
 
     return {
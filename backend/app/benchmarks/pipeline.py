@@ -0,0 +1,272 @@
+# app/benchmarks/pipeline.py
+"""
+Stage-level pipeline benchmark + stenosis accuracy check on synthetic angiograms.
+
+    python -m benchmarks.pipeline [--frames 20] [--repeat 3] [--detector oracle|yolo]
+        [--json OUT] [--baseline PREVIOUS.json]
+
+Runs the same stages as `run_frame_pipeline` on deterministic images
+from benchmarks.synthetic, in-process and one at a time, so each can be
+timed on its own: decode, yolo, roi, frangi, skeleton (skeleton/EDT
+measurement), artery (stub classifier, offline), render (annotated ROIs
+and the encoded overlay) and io (artifact encodes/writes and the
+stage-cache blob, into a temporary directory).
+
+The default `oracle` detector feeds the ground-truth boxes in place of
+YOLO, so no weights are needed and accuracy reflects segmentation and
+measurement only. Computed percentages are compared with the known
+diameter reductions; exits non-zero when the mean absolute error or
+the share of unmeasured lesions exceeds --max-mae / --max-unmeasured.
+The --max-mae default sits just above the MAE of the default frame set
+(seed 0, 20 frames: 7.0 pts), so it catches regressions there; raise it
+for other sets. With --baseline, per-stage changes against an earlier
+--json are shown, and a run over the same frames also fails when its
+MAE is more than --mae-tolerance above the baseline's.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+os.environ.setdefault("DATABASE_URL", "postgresql://bench@localhost/bench")  # settings only; no DB used
+
+import cv2
+
+from benchmarks.synthetic import synthetic_angiogram
+from core.config import settings
+from services.image_service import encode
+from services.stenosis_pipeline import stage_cache
+from services.stenosis_pipeline.artery_vision_service import StubArteryClassifier
+from services.stenosis_pipeline.frame import Frame
+from services.stenosis_pipeline.mask_service import segment_lumen
+from services.stenosis_pipeline.pipeline import _lesion_geometry
+from services.stenosis_pipeline.roi_service import extract_roi, group_detections, ROI_SCALE
+from services.stenosis_pipeline.stenosis_service import draw_overlay, draw_stenosis, measure_stenosis
+
+STAGES = ("decode", "yolo", "roi", "frangi", "skeleton", "artery", "render", "io")
+
+
+class StageTimer:
+    """Per-frame seconds (and optionally traced peak bytes) for each stage."""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.seconds = defaultdict(float)
+        self.peak = defaultdict(int)
+
+    @contextmanager
+    def __call__(self, stage):
+        if self.trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        self.seconds[stage] += time.perf_counter() - start
+        if self.trace:
+            self.peak[stage] = max(self.peak[stage], tracemalloc.get_traced_memory()[1] - base)
+
+
+def oracle_detections(frame, truth):
+    return [{"box": lesion["box"], "confidence": 1.0} for lesion in truth]
+
+
+def yolo_detections(frame, truth):
+    from services.stenosis_pipeline.yolo_service import detect_stenosis
+    out = detect_stenosis(frame)
+    return out["detections"] if out["detected"] else []
+
+
+DETECTORS = {"oracle": oracle_detections, "yolo": yolo_detections}
+
+
+def run_frame(stage, name, data, truth, detector, io_dir):
+    """One synthetic frame through every stage -> [(box, measurement)]."""
+    with stage("decode"):
+        frame = Frame.from_bytes(data, name)
+        frame.image
+
+    with stage("yolo"):
+        detections = detector(frame, truth)
+
+    with stage("roi"):
+        groups = group_detections(detections, frame.shape, ROI_SCALE)
+        rois = [
+            (rect, members, *extract_roi(frame, rect, [detections[i]["box"] for i in members]))
+            for rect, members in groups
+        ]
+
+    results, geometry, annotated = [], [], []
+    for roi_index, (rect, members, roi, meta) in enumerate(rois):
+        with stage("frangi"):
+            mask = segment_lumen(roi)
+
+        with stage("skeleton"):
+            measurements = [measure_stenosis(mask, box) for box in meta["yolo_boxes"]]
+
+        with stage("render"):
+            annotated.append(draw_stenosis(roi, meta, measurements))
+
+        with stage("io"):
+            stem = os.path.join(io_dir, f"{name}_roi{roi_index}")
+            for kind, image in (("roi", roi), ("mask", mask)):
+                fmt = settings.ARTIFACT_FORMATS.get(kind, "png")
+                with open(f"{stem}_{kind}.{fmt}", "wb") as f:
+                    f.write(encode(image, fmt))
+            stage_cache.put(stage_cache.stage_key("analyse", name, roi_index), (mask, measurements))
+
+        for i, measurement in zip(members, measurements):
+            box = detections[i]["box"]
+            results.append((box, measurement))
+            geometry.append(_lesion_geometry(box, rect, measurement))
+
+    with stage("artery"):
+        asyncio.run(StubArteryClassifier().classify_batch(annotated))
+
+    with stage("render"):
+        encode(draw_overlay(frame.image, geometry), settings.OVERLAY_FORMAT)
+
+    return results
+
+
+def score(truth, results):
+    """Error (computed - true, points) per ground-truth lesion; None when unmeasured."""
+    errors = []
+    for lesion in truth:
+        x, y = lesion["point"]
+        hits = [
+            m["percent"] for (x1, y1, x2, y2), m in results
+            if x1 <= x <= x2 and y1 <= y <= y2 and m["percent"] is not None
+        ]
+        errors.append(hits[0] - lesion["percent"] if hits else None)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=768)
+    parser.add_argument("--lesions", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default="oracle")
+    parser.add_argument("--max-mae", type=float, default=7.5)
+    parser.add_argument("--mae-tolerance", type=float, default=0.5,
+                        help="allowed MAE increase over --baseline (same frames)")
+    parser.add_argument("--max-unmeasured", type=float, default=0.25)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="results of an earlier --json run to compare with")
+    args = parser.parse_args()
+
+    detector = DETECTORS[args.detector]
+
+    # Generation and the PNG encode are setup, not pipeline work
+    frames = []
+    for seed in range(args.seed, args.seed + args.frames):
+        image, truth = synthetic_angiogram(seed, (args.size, args.size), lesions=args.lesions)
+        frames.append((f"synthetic_{seed:04d}", cv2.imencode(".png", image)[1].tobytes(), truth))
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as io_dir:
+        settings.STAGE_CACHE_DIR = os.path.join(io_dir, "stages")
+
+        # Untraced passes for latency, then one traced pass for memory + accuracy
+        per_frame = defaultdict(list)
+        for _ in range(args.repeat):
+            for name, data, truth in frames:
+                timer = StageTimer()
+                run_frame(timer, name, data, truth, detector, io_dir)
+                for stage in STAGES:
+                    per_frame[stage].append(timer.seconds[stage])
+
+        tracer = StageTimer(trace=True)
+        errors = []
+        tracemalloc.start()
+        for name, data, truth in frames:
+            errors += score(truth, run_frame(tracer, name, data, truth, detector, io_dir))
+        tracemalloc.stop()
+
+    stages = {}
+    for stage in STAGES:
+        times = sorted(per_frame[stage])
+        stages[stage] = {
+            "median_ms": statistics.median(times) * 1000,
+            "p90_ms": times[int(0.9 * (len(times) - 1))] * 1000,
+            "peak_mib": tracer.peak[stage] / 2 ** 20,
+        }
+    total_ms = sum(s["median_ms"] for s in stages.values())
+
+    measured = [e for e in errors if e is not None]
+    accuracy = {
+        "lesions": len(errors),
+        "unmeasured": len(errors) - len(measured),
+        "mae": statistics.mean(abs(e) for e in measured) if measured else None,
+        "bias": statistics.mean(measured) if measured else None,
+        "p90_abs_error": sorted(abs(e) for e in measured)[int(0.9 * (len(measured) - 1))] if measured else None,
+    }
+    results = {
+        "frames": args.frames, "seed": args.seed, "size": args.size, "lesions": args.lesions,
+        "repeat": args.repeat, "detector": args.detector,
+        "stages": stages,
+        "total_ms": total_ms,
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "accuracy": accuracy,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    # Accuracy is only comparable over the same synthetic frames
+    same_frames = baseline is not None and all(
+        baseline.get(k) == results[k] for k in ("frames", "seed", "size", "lesions", "detector")
+    )
+
+    print(f"{args.frames} synthetic frames {args.size}px, {args.lesions} lesions each, "
+          f"detector {args.detector}, {args.repeat} timed passes")
+    print(f"{'stage':10} {'median ms':>10} {'p90 ms':>8} {'share':>7} {'peak MiB':>9}"
+          + (f" {'vs base':>9}" if baseline else ""))
+    for stage, s in stages.items():
+        line = (f"{stage:10} {s['median_ms']:10.2f} {s['p90_ms']:8.2f} "
+                f"{s['median_ms'] / total_ms:6.1%} {s['peak_mib']:9.1f}")
+        if baseline and stage in baseline["stages"]:
+            before = baseline["stages"][stage]["median_ms"]
+            line += f" {(s['median_ms'] / before - 1) if before else 0:+8.1%}"
+        print(line)
+    print(f"{'total':10} {total_ms:10.2f}" + (
+        f"{'':27} {total_ms / baseline['total_ms'] - 1:+8.1%}" if baseline else ""))
+    print(f"max RSS {results['max_rss_mib']:.0f} MiB")
+
+    if measured:
+        print(f"\naccuracy: {len(measured)}/{len(errors)} lesions measured, "
+              f"MAE {accuracy['mae']:.1f} pts, bias {accuracy['bias']:+.1f}, "
+              f"p90 |error| {accuracy['p90_abs_error']:.1f}")
+        if same_frames and baseline["accuracy"]["mae"] is not None:
+            print(f"          MAE was {baseline['accuracy']['mae']:.1f} pts")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    unmeasured = accuracy["unmeasured"] / max(1, len(errors))
+    if not measured or accuracy["mae"] > args.max_mae or unmeasured > args.max_unmeasured:
+        print(f"\nFAIL: MAE above {args.max_mae} pts or more than "
+              f"{args.max_unmeasured:.0%} of lesions unmeasured")
+        sys.exit(1)
+
+    before = baseline["accuracy"]["mae"] if same_frames else None
+    if before is not None and accuracy["mae"] > before + args.mae_tolerance:
+        print(f"\nFAIL: MAE {accuracy['mae']:.1f} pts regressed from {before:.1f} "
+              f"(tolerance {args.mae_tolerance})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
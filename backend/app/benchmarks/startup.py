@@ -0,0 +1,109 @@
+# app/benchmarks/startup.py
+"""
+API worker cold-start benchmark + lazy-import check.
+
+    python -m benchmarks.startup [--repeat 3] [--warmup yolo artery] [--top 15]
+
+Each measurement runs in a fresh interpreter:
+
+- import: `import main` (what every API worker pays), its peak RSS, and
+  whether heavy model libraries were pulled in;
+- warmup: `import main` followed by `registry.warmup(...)` (what the
+  first inference, or MODEL_WARMUP, pays).
+
+Prints the slowest modules from `-X importtime` and exits non-zero when
+importing the app loads any of LAZY_MODULES.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Must stay out of `import main`; they belong to the model registry
+LAZY_MODULES = ("torch", "ultralytics", "openai")
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter() - start
+warm = None
+names = {names!r}
+if names:
+    from services.stenosis_pipeline.model_registry import registry
+    start = time.perf_counter()
+    registry.warmup(names)
+    warm = time.perf_counter() - start
+print(json.dumps({{
+    "import_s": imported,
+    "warmup_s": warm,
+    "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "postgresql://bench@localhost/bench")  # engine is lazy; no DB used
+    return env
+
+
+def probe(names):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(names=list(names), lazy=LAZY_MODULES)],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", nargs="*", default=["yolo", "artery"])
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cold = [probe([]) for _ in range(args.repeat)]
+    print(f"import main       {statistics.median(r['import_s'] for r in cold) * 1000:8.0f} ms"
+          f"   peak RSS {statistics.median(r['max_rss_mib'] for r in cold):6.0f} MiB")
+
+    if args.warmup:
+        try:
+            warm = [probe(args.warmup) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"warmup {args.warmup} failed:\n{e.stderr.strip().splitlines()[-1]}")
+        else:
+            print(f"+ warmup {','.join(args.warmup):9}{statistics.median(r['warmup_s'] for r in warm) * 1000:8.0f} ms"
+                  f"   peak RSS {statistics.median(r['max_rss_mib'] for r in warm):6.0f} MiB")
+
+    print(f"\nslowest imports (cumulative) under `import main`:")
+    for cumulative_us, module in import_profile(args.top):
+        print(f"{cumulative_us / 1000:8.1f} ms {module}")
+
+    leaked = sorted({m for r in cold for m in r["loaded"]})
+    if leaked:
+        print(f"\nFAIL: `import main` loaded {', '.join(leaked)}")
+        sys.exit(1)
+    print(f"\nOK: none of {', '.join(LAZY_MODULES)} imported at startup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# app/benchmarks/synthetic.py
+"""
+Deterministic synthetic angiograms with known stenoses.
+
+`synthetic_angiogram(seed)` draws a branching vessel tree (dark,
+contrast-filled lumens on a bright, uneven background), narrows some
+segments by a known diameter reduction, then blurs and adds noise. The
+same seed always gives the same image and ground truth, so benchmark
+runs are comparable across commits and machines.
+"""
+import cv2
+import numpy as np
+
+# Supersampling factor for anti-aliased vessel edges
+_SS = 4
+
+
+def _walk(rng, start, heading, length, step=2.0, wiggle=0.03):
+    """Gently curving centerline around `heading`: (N, 2) float x, y points."""
+    points = [np.asarray(start, dtype=np.float64)]
+    offset = 0.0
+    for _ in range(int(length / step)):
+        # Mean-reverting drift: bends, but never curls back on itself
+        offset = 0.98 * offset + rng.normal(0, wiggle)
+        angle = heading + offset
+        points.append(points[-1] + step * np.array([np.cos(angle), np.sin(angle)]))
+    return np.array(points)
+
+
+def _narrowing(n, center, half_width, percent):
+    """Radius multiplier along a centerline: cosine dip to 1 - percent."""
+    t = np.clip((np.arange(n) - center) / half_width, -1, 1)
+    return 1 - (percent / 100) * 0.5 * (1 + np.cos(np.pi * t))
+
+
+def _vessel_tree(rng, size, branches):
+    """[(centerline, radius, junctions)] for a trunk entering from the top plus side branches."""
+    h, w = size
+    trunk_radius = rng.uniform(6.0, 8.0)
+    trunk = _walk(rng, (rng.uniform(0.3, 0.7) * w, 0), np.pi / 2 + rng.normal(0, 0.2), 1.1 * h)
+    vessels = [(trunk, np.linspace(trunk_radius, 0.7 * trunk_radius, len(trunk)), [])]
+
+    for _ in range(branches):
+        parent, radius, junctions = vessels[rng.integers(len(vessels))]
+        at = int(rng.uniform(0.2, 0.6) * len(parent))
+        junctions.append(at)
+        direction = parent[min(at + 1, len(parent) - 1)] - parent[at]
+        heading = np.arctan2(direction[1], direction[0]) + rng.choice([-1, 1]) * rng.uniform(0.5, 1.0)
+        start_radius = max(3.0, 0.7 * radius[at])
+        branch = _walk(rng, parent[at], heading, rng.uniform(0.35, 0.6) * h)
+        vessels.append((branch, np.linspace(start_radius, 0.75 * start_radius, len(branch)), [0]))
+
+    return vessels
+
+
+def _inside(points, size, margin):
+    h, w = size
+    return ((points[:, 0] > margin) & (points[:, 0] < w - margin)
+            & (points[:, 1] > margin) & (points[:, 1] < h - margin))
+
+
+def _place_lesions(rng, vessels, size, count, percent_range):
+    """Narrow `count` vessels in place; returns the ground-truth lesions."""
+    lesions = []
+    order = rng.permutation(len(vessels))[:count]
+    for index in order:
+        centerline, radius, junctions = vessels[index]
+        half_width = rng.uniform(6, 10)  # centerline steps (2px each)
+
+        # Keep the lesion and a reference stretch either side inside the
+        # frame and clear of branch points (ambiguous reference diameter)
+        steps = np.arange(len(centerline))
+        ok = _inside(centerline, size, 60)
+        ok &= (steps > 0.25 * len(centerline)) & (steps < 0.75 * len(centerline))
+        for at in junctions:
+            ok &= np.abs(steps - at) > 3 * half_width
+        candidates = np.nonzero(ok)[0]
+        if len(candidates) == 0:
+            continue
+        center = int(rng.choice(candidates))
+
+        percent = float(rng.uniform(*percent_range))
+        radius *= _narrowing(len(radius), center, half_width, percent)
+
+        # Detector-style box: the narrowed stretch plus about one vessel width
+        span = centerline[max(0, center - int(half_width)):center + int(half_width) + 1]
+        pad = 2 * radius[max(0, center - int(2 * half_width))]
+        x1, y1 = span.min(axis=0) - pad
+        x2, y2 = span.max(axis=0) + pad
+        lesions.append({
+            "box": [float(x1), float(y1), float(x2), float(y2)],
+            "percent": round(percent, 2),
+            "point": [int(round(v)) for v in centerline[center]],
+        })
+
+    return lesions
+
+
+def _render(vessels, size, rng, contrast, noise):
+    h, w = size
+    coverage = np.zeros((h * _SS, w * _SS), np.uint8)
+    for centerline, radius, _ in vessels:
+        for (x, y), r in zip(centerline * _SS, radius * _SS):
+            cv2.circle(coverage, (int(x), int(y)), max(1, int(r)), 255, -1, cv2.LINE_AA)
+    coverage = cv2.resize(coverage, (w, h), interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+
+    # Uneven exposure: smooth low-frequency field around mid-grey
+    field = cv2.resize(rng.uniform(150, 200, (6, 6)).astype(np.float32), (w, h), interpolation=cv2.INTER_CUBIC)
+    image = field * (1 - contrast * coverage)
+    image = cv2.GaussianBlur(image, (0, 0), 1.0)
+    image += rng.normal(0, noise, image.shape).astype(np.float32)
+    gray = np.clip(image, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def synthetic_angiogram(seed, size=(768, 768), branches=5, lesions=3,
+                        percent_range=(30, 80), contrast=0.55, noise=6.0):
+    """
+    (BGR image, [lesion]) for `seed`.
+
+    Each lesion is {"box": [x1, y1, x2, y2], "percent": true diameter
+    reduction, "point": [x, y] of the narrowest centerline point}, in
+    frame pixels, most severe first (the order YOLO's confidence sort
+    would not guarantee, but a stable one).
+    """
+    rng = np.random.default_rng(seed)
+    vessels = _vessel_tree(rng, size, branches)
+    truth = _place_lesions(rng, vessels, size, lesions, percent_range)
+    image = _render(vessels, size, rng, contrast, noise)
+    return image, sorted(truth, key=lambda lesion: -lesion["percent"])
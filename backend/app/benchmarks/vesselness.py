@@ -0,0 +1,136 @@
+# app/benchmarks/vesselness.py
+"""
+Vesselness engine benchmark + mask agreement check.
+
+    python -m benchmarks.vesselness [--images GLOB | --synthetic N] [--roi 384] [--repeat 5]
+
+Times `lumen_mask` with the fast float32 engine against the skimage
+reference on centre crops of stored angiograms (or of N synthetic ones
+from benchmarks.synthetic, offline), records peak traced memory per
+call, and reports how closely the masks agree (Dice) and how closely
+the raw responses correlate. The fast engine is an approximation, so
+the check bounds the disagreement: exits non-zero when mean Dice falls
+below --min-dice or any single ROI below --min-roi-dice.
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("DATABASE_URL", "postgresql://bench@localhost/bench")  # settings only; no DB used
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import synthetic_angiogram
+from services.stenosis_pipeline.mask_service import lumen_mask, vesselness
+
+ENGINES = ("skimage", "fast")
+
+
+def centre_crop(gray, size):
+    h, w = gray.shape
+    y, x = max(0, (h - size) // 2), max(0, (w - size) // 2)
+    return gray[y:y + size, x:x + size]
+
+
+def load_rois(pattern, size, limit):
+    rois = []
+    for path in sorted(glob.glob(pattern, recursive=True))[:limit]:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is not None:
+            rois.append(centre_crop(gray, size))
+    return rois
+
+
+def synthetic_rois(count, size):
+    return [
+        centre_crop(cv2.cvtColor(synthetic_angiogram(seed)[0], cv2.COLOR_BGR2GRAY), size)
+        for seed in range(count)
+    ]
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def dice(a, b):
+    a, b = a > 0, b > 0
+    total = a.sum() + b.sum()
+    return 1.0 if total == 0 else 2.0 * (a & b).sum() / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", default="storage/dicom/**/*.jpg")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="use N synthetic angiograms instead of --images")
+    parser.add_argument("--roi", type=int, default=384)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-dice", type=float, default=0.95)
+    parser.add_argument("--min-roi-dice", type=float, default=0.8)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rois = synthetic_rois(args.synthetic, args.roi)
+    else:
+        rois = load_rois(args.images, args.roi, args.limit)
+    if not rois:
+        sys.exit(f"No images match {args.images}")
+
+    latency = {engine: [] for engine in ENGINES}
+    memory = {engine: [] for engine in ENGINES}
+    dices, correlations = [], []
+
+    for gray in rois:
+        masks = {}
+        for engine in ENGINES:
+            seconds, peak = measure(lambda: lumen_mask(gray, engine), args.repeat)
+            latency[engine].append(seconds)
+            memory[engine].append(peak)
+            masks[engine] = lumen_mask(gray, engine)
+
+        dices.append(dice(masks["skimage"], masks["fast"]))
+        correlations.append(np.corrcoef(
+            vesselness(gray, "skimage").ravel(),
+            vesselness(gray, "fast").ravel(),
+        )[0, 1])
+
+    print(f"{len(rois)} ROIs of up to {args.roi}x{args.roi} px, median of {args.repeat} runs")
+    print(f"{'engine':10} {'latency ms':>12} {'peak MiB':>10}")
+    for engine in ENGINES:
+        print(
+            f"{engine:10} {statistics.median(latency[engine]) * 1000:12.1f} "
+            f"{statistics.median(memory[engine]) / 2**20:10.1f}"
+        )
+
+    speedup = statistics.median(latency["skimage"]) / statistics.median(latency["fast"])
+    print(f"speedup x{speedup:.1f}")
+    print(f"mask Dice mean {statistics.mean(dices):.3f} min {min(dices):.3f}")
+    print(f"response correlation mean {statistics.mean(correlations):.4f}")
+
+    worst = sorted(range(len(dices)), key=dices.__getitem__)[:3]
+    print("lowest Dice ROIs: " + ", ".join(f"#{i} {dices[i]:.3f}" for i in worst))
+
+    ok = statistics.mean(dices) >= args.min_dice and min(dices) >= args.min_roi_dice
+    if not ok:
+        print(f"FAIL: mean Dice below {args.min_dice} or an ROI below {args.min_roi_dice}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
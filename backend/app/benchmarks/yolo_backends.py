@@ -0,0 +1,136 @@
+# app/benchmarks/yolo_backends.py
+"""
+YOLO backend export, parity check and CPU latency comparison.
+
+    python -m benchmarks.yolo_backends [--export onnx torchscript]
+        [--backends pt onnx torchscript] [--images GLOB] [--threads N]
+
+Exports the requested formats from best.pt (YOLO_IMGSZ), runs every
+backend over the same images and compares each one against the `.pt`
+model: detections matched by IoU, mean IoU of matches, largest
+confidence difference, and median / p90 latency per image. Exits
+non-zero when a backend misses or invents boxes or drifts beyond
+--min-iou / --max-conf-delta.
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "postgresql://bench@localhost/bench")  # settings only; no DB used
+
+import cv2
+import numpy as np
+
+from core.config import settings
+from services.stenosis_pipeline import yolo_service
+
+
+def load(backend):
+    settings.YOLO_BACKEND = backend
+    model = yolo_service._load_yolo()
+    yolo_service._warm_yolo(model)
+    return model
+
+
+def boxes(results):
+    b = results[0].boxes
+    return b.xyxy.cpu().numpy(), b.conf.cpu().numpy()
+
+
+def iou(a, b):
+    x1, y1 = np.maximum(a[:2], b[:2])
+    x2, y2 = np.minimum(a[2:], b[2:])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare(reference, candidate):
+    """Greedy IoU matching -> (matched, unmatched, ious, conf deltas)."""
+    ref_xyxy, ref_conf = reference
+    cand_xyxy, cand_conf = candidate
+    used, ious, deltas = set(), [], []
+    for i, box in enumerate(ref_xyxy):
+        scores = [(iou(box, c), j) for j, c in enumerate(cand_xyxy) if j not in used]
+        if not scores:
+            continue
+        best, j = max(scores)
+        if best >= 0.5:
+            used.add(j)
+            ious.append(best)
+            deltas.append(abs(float(ref_conf[i]) - float(cand_conf[j])))
+    unmatched = len(ref_xyxy) + len(cand_xyxy) - 2 * len(ious)
+    return len(ious), unmatched, ious, deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--export", nargs="*", default=[], choices=["onnx", "torchscript"])
+    parser.add_argument("--backends", nargs="+", default=["pt", "onnx", "torchscript"])
+    parser.add_argument("--images", default="storage/dicom/**/*.jpg")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=settings.YOLO_THREADS)
+    parser.add_argument("--min-iou", type=float, default=0.9)
+    parser.add_argument("--max-conf-delta", type=float, default=0.05)
+    args = parser.parse_args()
+
+    settings.YOLO_THREADS = args.threads
+
+    for backend in args.export:
+        print(f"exported {backend}: {yolo_service.export_yolo(backend)}")
+
+    paths = sorted(glob.glob(args.images, recursive=True))[:args.limit]
+    images = [img for img in (cv2.imread(p) for p in paths) if img is not None]
+    if not images:
+        sys.exit(f"No images match {args.images}")
+
+    backends = [b for b in args.backends if yolo_service.model_path(b).exists()]
+    if "pt" not in backends:
+        sys.exit(f"{yolo_service.model_path('pt')} is required as the reference")
+
+    outputs, latency = {}, {}
+    for backend in backends:
+        model = load(backend)
+        outputs[backend], latency[backend] = [], []
+        for img in images:
+            start = time.perf_counter()
+            results = yolo_service.predict(model, img)
+            latency[backend].append(time.perf_counter() - start)
+            outputs[backend].append(boxes(results))
+
+    print(f"{len(images)} images, imgsz {settings.YOLO_IMGSZ}, threads {args.threads or 'default'}")
+    print(f"{'backend':12} {'median ms':>10} {'p90 ms':>8} {'speedup':>8} "
+          f"{'matched':>8} {'unmatched':>10} {'mean IoU':>9} {'max dconf':>10}")
+
+    reference_ms = statistics.median(latency["pt"])
+    failed = False
+    for backend in backends:
+        times = sorted(latency[backend])
+        median = statistics.median(times)
+        p90 = times[int(0.9 * (len(times) - 1))]
+
+        matched = unmatched = 0
+        ious, deltas = [], []
+        for ref, cand in zip(outputs["pt"], outputs[backend]):
+            m, u, i, d = compare(ref, cand)
+            matched, unmatched = matched + m, unmatched + u
+            ious += i
+            deltas += d
+
+        mean_iou = statistics.mean(ious) if ious else 1.0
+        max_delta = max(deltas, default=0.0)
+        print(f"{backend:12} {median * 1000:10.1f} {p90 * 1000:8.1f} "
+              f"{reference_ms / median:7.2f}x {matched:8} {unmatched:10} "
+              f"{mean_iou:9.3f} {max_delta:10.3f}")
+
+        if unmatched or mean_iou < args.min_iou or max_delta > args.max_conf_delta:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,134 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Literal
 
 BASE_DIR = Path(__file__).resolve().parents[3]  # atrio/
 
+# Encodings cv2.imencode is given quality flags for (artifact_writer.QUALITY_FLAGS)
+ImageFormat = Literal["png", "jpg", "webp"]
+DEFAULT_IMAGE_QUALITY = {"png": 1, "jpg": 85, "webp": 80}
+
 class Settings(BaseSettings):
     ENV: str = "dev"
     PROJECT_NAME: str = "Angio AI"
     DATABASE_URL: str
 
+    # Database engine
+    DB_ECHO: bool = False                 # log every statement (slow; dev only)
+    DB_SSL: bool = True
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0         # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800           # seconds; stay under server/proxy idle timeouts
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100    # asyncpg prepared statements per connection; 0 behind pgbouncer (transaction mode)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100  # SQLAlchemy's asyncpg prepared-statement LRU
+
     DICOM_STORAGE_PATH: str = "storage/dicom"
     REPORT_STORAGE_PATH: str = "storage/reports"
 
+    # Uploads
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    UPLOAD_MAX_FILE_BYTES: int = 1024 * 1024 * 1024        # 1 GiB per file
+    UPLOAD_MAX_BATCH_BYTES: int = 4 * 1024 * 1024 * 1024   # 4 GiB per request
+    BLOB_GC_MIN_AGE_HOURS: float = 24.0   # unreferenced blobs younger than this are kept (uploads in flight)
+
+    # Background inference jobs
+    INFERENCE_QUEUE_SIZE: int = 32        # pending jobs before 429
+    INFERENCE_JOB_WORKERS: int = 2        # studies processed concurrently
+    INFERENCE_EXECUTOR_THREADS: int = 4   # threads running the sync pipeline
+    INFERENCE_JOB_RETENTION_HOURS: float = 168.0  # finished jobs kept for GET /jobs
+    INFERENCE_JOB_SYNC_SECONDS: float = 1.0  # how often a running job's progress is saved
+    INFERENCE_IMAGE_CONCURRENCY: int | None = None  # images in flight per study (None = CPU count)
+    FINDINGS_FLUSH_SIZE: int = 100        # findings per multi-row upsert
+    FINDINGS_FLUSH_SECONDS: float = 5.0   # max age of buffered findings
+
+    # Process pool for CPU-bound segmentation / skeleton stages
+    CPU_POOL_WORKERS: int | None = None   # None = CPU count, 0 = run inline
+    CPU_WORKER_THREADS: int = 1           # torch / OpenCV / BLAS threads per worker
+    CPU_POOL_START_METHOD: str = "spawn"
+
+    # Lumen segmentation
+    VESSELNESS_ENGINE: Literal["fast", "skimage"] = "fast"  # fast: float32 OpenCV; skimage: reference
+    VESSELNESS_SIGMAS: list[float] = [1, 3, 5, 7, 9]
+
+    # Pipeline artifacts (written off the request path by artifact_writer)
+    ARTIFACT_MODE: Literal["all", "metrics_only"] = "all"  # metrics_only skips debug ROI / mask images
+    ARTIFACT_QUEUE_BYTES: int = 256 * 1024 * 1024  # queued image bytes before pipeline threads block
+    ARTIFACT_WRITER_THREADS: int = 2
+    ARTIFACT_FORMATS: dict[str, ImageFormat] = {  # artifact kind -> png | jpg | webp
+        "roi": "png",
+        "mask": "png",
+    }
+    ARTIFACT_QUALITY: dict[ImageFormat, int] = DEFAULT_IMAGE_QUALITY  # jpg / webp quality, png compression level
+
+    # Overlays (boxes, diameter points, percent) rendered on request from
+    # stored finding geometry
+    OVERLAY_FORMAT: ImageFormat = "webp"  # png | jpg | webp, quality from ARTIFACT_QUALITY
+    OVERLAY_CACHE_BYTES: int = 64 * 1024 * 1024  # encoded overlays kept in memory
+
+    # Conditional GET / server-side cache for polled JSON (core/response_cache.py)
+    RESPONSE_CACHE_ENTRIES: int = 512
+
+    # Image serving: thumbnail / preview levels built once per stored image
+    IMAGE_PYRAMID_DIR: str = "storage/cache/pyramid"
+    IMAGE_PYRAMID_FORMAT: ImageFormat = "webp"  # png | jpg | webp, quality from ARTIFACT_QUALITY
+    IMAGE_THUMB_SIDE: int = 256           # longest side, px
+    IMAGE_PREVIEW_SIDE: int = 1024
+    IMAGE_CACHE_MAX_AGE: int = 86400      # browser Cache-Control max-age, seconds (not overlays)
+
+    # Models load on first use; listed ones are loaded in the background at
+    # startup and gate /ready (e.g. ["yolo", "artery"])
+    MODEL_WARMUP: list[str] = []
+
+    # YOLO detector
+    YOLO_BACKEND: Literal["pt", "onnx", "torchscript"] = "pt"  # exports: benchmarks/yolo_backends.py
+    YOLO_IMGSZ: int = 640                 # inference input size; exports are built for it
+    YOLO_THREADS: int | None = None       # intra-op threads (torch / onnxruntime); None = library default
+
+    # Multi-frame DICOM (cine) runs
+    CINE_KEY_FRAMES: int = 3              # frames per run sent through the pipeline
+    CINE_SCORE_STRIDE: int = 1            # score every Nth frame when selecting
+    CINE_MIN_FRAME_GAP: int = 5           # min distance between selected frames
+
+    # Artery-name classification cache
+    ARTERY_CACHE_DIR: str = "storage/cache/artery"
+    ARTERY_CACHE_MEMORY_ENTRIES: int = 2048
+    ARTERY_CACHE_DISK_ENTRIES: int = 100_000
+    ARTERY_CACHE_PHASH_DISTANCE: int | None = None  # max Hamming distance for near-duplicate reuse; None = exact only
+
+    # Artery classifier backend
+    ARTERY_CLASSIFIER_BACKEND: Literal["azure", "stub"] = "azure"
+    ARTERY_MAX_CONCURRENCY: int = 4       # requests in flight to the backend
+    ARTERY_TIMEOUT_S: float = 30.0
+    ARTERY_MAX_RETRIES: int = 3
+    ARTERY_MAX_SIDE: int = 512            # ROI is downscaled to this before upload
+    ARTERY_JPEG_QUALITY: int = 85
+    ARTERY_BATCH_SIZE: int = 4            # ROIs per multi-image request
+    ARTERY_BATCH_WINDOW_MS: int = 50      # wait this long to fill a batch
+    ARTERY_STUB_LATENCY_MS: int = 0       # simulated round trip for load tests
+
+    # Content-addressed stage memoization
+    STAGE_CACHE_ENABLED: bool = True
+    STAGE_CACHE_DIR: str = "storage/cache/stages"
+    STAGE_CACHE_LEVEL: int = 3            # zstd compression level
+    STAGE_CACHE_MAX_BYTES: int = 10 * 1024 * 1024 * 1024  # least recently used entries evicted beyond this
+
+    # Opt-in sampling profiler (see core/profiling.py); output is folded stacks
+    PROFILE_TOKEN: str | None = None      # `X-Profile: <token>` profiles that request; unset = header ignored
+    PROFILE_SAMPLE_RATE: float = 0.0      # fraction of requests profiled at random (0 = off)
+    PROFILE_INTERVAL_MS: float = 5.0      # stack sampling period
+    PROFILE_DIR: str = "storage/profiles"
+    PROFILE_MAX_FILES: int = 200          # oldest profiles are deleted beyond this
+    PROFILE_MAX_AGE_HOURS: float = 72.0
+
+    @field_validator("ARTIFACT_QUALITY")
+    @classmethod
+    def _quality_for_every_format(cls, quality):
+        # A partial override (e.g. only "webp") keeps the other defaults
+        return {**DEFAULT_IMAGE_QUALITY, **quality}
+
     model_config = {
         "env_file": ".env",
         "extra": "allow",   # ✅ THIS FIXES IT
@@ -0,0 +1,212 @@
+# app/core/profiling.py
+"""
+Opt-in sampling profiler for single requests and inference jobs.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+picked at PROFILE_SAMPLE_RATE; an inference job inherits the decision
+of the request that queued it. While a profile is open, one sampler
+thread snapshots the stacks of the threads working for it (the event
+loop thread plus executor threads entered through `bind`) every
+PROFILE_INTERVAL_MS, and the result is written as folded stacks
+(`thread;outer;...;inner count`), which flamegraph.pl, speedscope and
+inferno read directly.
+
+Costs nothing when no profile is open. Caveats: the loop thread also
+serves other requests, so its samples are not exclusive to the profiled
+one; work in the CPU process pool shows up as the pipeline thread
+waiting on it (its duration is in pipeline_stage_seconds).
+"""
+import asyncio
+import functools
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from core.config import settings
+
+HEADER = "x-profile"
+
+_active: ContextVar["Profile | None"] = ContextVar("active_profile", default=None)
+_requested: ContextVar[bool] = ContextVar("profile_requested", default=False)
+
+
+class Profile:
+    def __init__(self, name):
+        self.name = name
+        self.samples = 0
+        self.stacks = Counter()
+        self._threads = Counter()  # thread ident -> nesting depth
+        self._lock = threading.Lock()
+
+    def enter_thread(self):
+        with self._lock:
+            self._threads[threading.get_ident()] += 1
+
+    def exit_thread(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def sample(self, frames, names):
+        with self._lock:
+            idents = list(self._threads)
+        self.samples += 1
+        for ident in idents:
+            frame = frames.get(ident)
+            if frame is not None:
+                self.stacks[_fold(frame, names.get(ident, str(ident)))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _fold(frame, thread_name):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+
+class _Sampler:
+    """One daemon thread for every open profile; runs only while any is open."""
+
+    def __init__(self):
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        interval = settings.PROFILE_INTERVAL_MS / 1000
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for profile in profiles:
+                profile.sample(frames, names)
+            del frames
+            time.sleep(interval)
+
+
+_sampler = _Sampler()
+
+
+def wants_profile(headers):
+    """Admin header with the configured token, or a random sample."""
+    token = settings.PROFILE_TOKEN
+    supplied = headers.get(HEADER)
+    if token and supplied and hmac.compare_digest(supplied.encode(), token.encode()):
+        return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def requested():
+    """Whether the current request is profiled (jobs it queues inherit this)."""
+    return _requested.get()
+
+
+@asynccontextmanager
+async def profile(name):
+    """
+    Profile the current thread, and threads entered via `bind`, until exit.
+
+    Yields the output file name (written on exit, off the event loop), or
+    None when another profile is already open in this context.
+    """
+    if _active.get() is not None:
+        yield None
+        return
+
+    current = Profile(name)
+    current.enter_thread()
+    active, requested_ = _active.set(current), _requested.set(True)
+    _sampler.add(current)
+    filename = f"{time.strftime('%Y%m%dT%H%M%S')}_{_slug(name)}_{uuid.uuid4().hex[:6]}.folded"
+    try:
+        yield filename
+    finally:
+        _sampler.remove(current)
+        _active.reset(active)
+        _requested.reset(requested_)
+        current.exit_thread()
+        await asyncio.to_thread(_write, current, filename)
+
+
+def bind(fn):
+    """
+    Wrap `fn` so the thread running it is sampled for the active profile.
+
+    Use for work handed to executors (run_in_executor does not carry
+    context variables over). A no-op wrapper when nothing is profiled.
+    """
+    current = _active.get()
+    if current is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        current.enter_thread()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            current.exit_thread()
+
+    return wrapper
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")[:80] or "request"
+
+
+def _write(current, filename):
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / filename
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(current.folded())
+    os.replace(tmp, path)
+    _enforce_retention(directory)
+
+
+def _enforce_retention(directory):
+    """Keep at most PROFILE_MAX_FILES profiles, none older than PROFILE_MAX_AGE_HOURS."""
+    files = []
+    for path in directory.glob("*.folded"):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    files.sort(reverse=True)
+
+    cutoff = time.time() - settings.PROFILE_MAX_AGE_HOURS * 3600
+    for index, (mtime, path) in enumerate(files):
+        if index >= settings.PROFILE_MAX_FILES or mtime < cutoff:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,123 @@
+# app/core/response_cache.py
+"""
+Versioned, in-process cache of serialized GET responses.
+
+Entries are keyed by resource and tagged with an ETag derived from a
+version the database maintains (studies.version, dashboard_version),
+so a poll costs one indexed lookup: 304 when the client's If-None-Match
+matches, the cached body when only the server has it. Versions are
+bumped in the same transaction as the rows they describe, so the ETag
+is the same on every worker process.
+
+Writers mark what they touched on the session (`mark_dirty`); the marks
+are applied when that session commits, dropping bodies no ETag will
+match again.
+"""
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.metrics import cache_lookup
+
+_DIRTY = "response_cache_dirty"
+
+
+class ResponseCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (resource, key) -> (etag, body)
+        self._lock = threading.Lock()
+
+    def get(self, resource, key, etag):
+        with self._lock:
+            entry = self._entries.get((resource, key))
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end((resource, key))
+            return entry[1]
+
+    def put(self, resource, key, etag, body):
+        with self._lock:
+            self._entries[(resource, key)] = (etag, body)
+            self._entries.move_to_end((resource, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, resource, key=None):
+        """Drop one key (or every key) of a resource."""
+        with self._lock:
+            if key is not None:
+                self._entries.pop((resource, key), None)
+                return
+            for k in [k for k in self._entries if k[0] == resource]:
+                del self._entries[k]
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_ENTRIES)
+
+
+def mark_dirty(db, resource, key=None):
+    """Invalidate (resource, key) once `db` commits."""
+    db.info.setdefault(_DIRTY, set()).add((resource, key))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_dirty(session):
+    for resource, key in session.info.pop(_DIRTY, ()):
+        response_cache.invalidate(resource, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session):
+    session.info.pop(_DIRTY, None)
+
+
+def not_modified(request: Request, headers):
+    """Whether the client's copy still matches the response `headers` (ETag, Last-Modified)."""
+    # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return headers["ETag"] in tags or "*" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            modified = parsedate_to_datetime(headers["Last-Modified"])
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+
+    return False
+
+
+async def cached_json(request: Request, resource, key, version, build):
+    """
+    Conditional, cached JSON response for a versioned resource.
+
+    `version` is the database-side version of (resource, key); `build`
+    is an async callable producing the payload, awaited only on a miss.
+    """
+    etag = f'"{resource}-{key}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if not_modified(request, headers):
+        cache_lookup(f"response_{resource}", True)
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(resource, key, etag)
+    cache_lookup(f"response_{resource}", body is not None)
+    if body is None:
+        payload = await build()
+        body = JSONResponse(jsonable_encoder(payload)).body
+        response_cache.put(resource, key, etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,144 @@
+# app/db/plan_check.py
+"""
+Query-plan regression check for the hot queries.
+
+Runs EXPLAIN for each query against the database in DATABASE_URL (a
+local Postgres migrated with `alembic upgrade head`) and exits non-zero
+if any of them plans a sequential scan:
+
+    python -m db.plan_check
+
+Seq scans are disabled for the session first, so on a small or empty
+database the planner still picks an index whenever one can serve the
+query - a Seq Scan in the output means no usable index exists.
+"""
+import asyncio
+import json
+import sys
+import uuid
+
+from sqlalchemy import text
+
+from db.session import engine
+from services.summary_service import _REFRESH_SQL
+
+_ID = str(uuid.uuid4())
+
+HOT_QUERIES = {
+    "findings-view": (
+        """
+        SELECT i.id, i.file_path, f.lesion_index, f.artery, f.blockage_pct,
+               f.confidence, f.heatmap_path, f.diameter_profile,
+               f.geometry IS NOT NULL
+        FROM images i JOIN findings f ON f.image_id = i.id
+        WHERE i.study_id = :id
+        ORDER BY i.id, f.lesion_index
+        """,
+        {"id": _ID},
+    ),
+    "generate_report_for_study": (
+        """
+        SELECT f.* FROM findings f JOIN images i ON f.image_id = i.id
+        WHERE i.study_id = :id
+        """,
+        {"id": _ID},
+    ),
+    "run_inference_for_study": (
+        "SELECT * FROM images WHERE study_id = :id",
+        {"id": _ID},
+    ),
+    "run_inference_for_study (findings reuse)": (
+        """
+        SELECT i.content_hash, f.* FROM images i JOIN findings f ON f.image_id = i.id
+        WHERE i.content_hash IN (:hash) AND i.study_id != :id
+          AND f.pipeline_version = :version
+        ORDER BY f.image_id, f.lesion_index
+        """,
+        {"hash": "0" * 64, "id": _ID, "version": "pipeline-0"},
+    ),
+    "render_overlay": (
+        """
+        SELECT i.file_path, f.lesion_index, f.geometry
+        FROM images i JOIN findings f ON f.image_id = i.id
+        WHERE i.id = :id
+        ORDER BY f.lesion_index
+        """,
+        {"id": _ID},
+    ),
+    "refresh_patient_summary": (
+        _REFRESH_SQL.text,
+        {"patient_id": _ID},
+    ),
+    "study_version": (
+        "SELECT version FROM studies WHERE id = :id",
+        {"id": _ID},
+    ),
+    "dashboard_version": (
+        "SELECT version FROM dashboard_version WHERE id",
+        {},
+    ),
+    "dashboard (first page)": (
+        """
+        SELECT * FROM patient_summaries
+        ORDER BY created_at DESC, patient_id DESC LIMIT 51
+        """,
+        {},
+    ),
+    "dashboard (next page)": (
+        """
+        SELECT * FROM patient_summaries
+        WHERE (created_at, patient_id) < (now(), :id)
+        ORDER BY created_at DESC, patient_id DESC LIMIT 51
+        """,
+        {"id": _ID},
+    ),
+}
+
+
+def _seq_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+async def explain_hot_queries():
+    """{name: JSON plan} for every hot query, with seq scans disabled."""
+    plans = {}
+
+    async with engine.connect() as conn:
+        for name, (sql, params) in HOT_QUERIES.items():
+            async with conn.begin() as tx:
+                await conn.execute(text("SET LOCAL enable_seqscan = off"))
+                raw = (
+                    await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params)
+                ).scalar_one()
+                await tx.rollback()
+
+            plans[name] = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+
+    await engine.dispose()
+    return plans
+
+
+async def check_plans():
+    failures = {}
+    for name, plan in (await explain_hot_queries()).items():
+        scans = sorted(set(_seq_scans(plan)))
+        if scans:
+            failures[name] = scans
+    return failures
+
+
+def main():
+    failures = asyncio.run(check_plans())
+
+    for name in HOT_QUERIES:
+        status = f"SEQ SCAN on {', '.join(failures[name])}" if name in failures else "ok"
+        print(f"{name:45} {status}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 # app/db/session.py
+import time
+import functools
+from contextvars import ContextVar
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from core.config import settings
+from core.metrics import histogram
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
 raw_url = settings.DATABASE_URL
@@ -19,15 +24,24 @@ query = parse_qs(parsed.query)
 query.pop("sslmode", None)          # ❗ asyncpg does not support this
 query.pop("channel_binding", None)  # ❗ also not supported by asyncpg
 
+# SQLAlchemy-level prepared statement LRU (asyncpg dialect URL option)
+query["prepared_statement_cache_size"] = [str(settings.DB_PREPARED_STATEMENT_CACHE_SIZE)]
+
 clean_query = urlencode(query, doseq=True)
 
 DATABASE_URL = urlunparse(parsed._replace(query=clean_query))
 
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
     connect_args={
-        "ssl": True  # ✅ asyncpg-compatible SSL
+        "ssl": settings.DB_SSL,  # ✅ asyncpg-compatible SSL
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
     },
 )
 
@@ -40,3 +54,52 @@ AsyncSessionLocal = sessionmaker(
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+# ---------- Query latency metrics ----------
+
+DB_STATEMENT_SECONDS = histogram(
+    "db_statement_seconds",
+    "Statement execution time, by calling service function and statement type",
+    ("operation", "statement"),
+)
+
+# Set by @track_queries; SQLAlchemy's async greenlets inherit the caller's
+# context, so cursor events can see which service function is running.
+current_operation: ContextVar[str] = ContextVar("current_operation", default="other")
+
+
+def track_queries(fn):
+    """Label every statement issued inside `fn` with its qualified name."""
+    label = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(label)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+    DB_STATEMENT_SECONDS.observe(elapsed, current_operation.get(), verb)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(exception_context):
+    # Keep the start-time stack balanced when a statement fails
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
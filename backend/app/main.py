@@ -1,20 +1,48 @@
 # app/main.py
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from api.router import router
 from core.config import settings
+from core.metrics import histogram, render_prometheus
+from core import profiling
+from services.job_service import start_workers, stop_workers, workers_running
+from services.stenosis_pipeline.cpu_pool import shutdown_pool
+from services.stenosis_pipeline.artifact_writer import artifact_writer
+from services.stenosis_pipeline.model_registry import registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_workers()
+    # ✅ Warm in the background: /health answers at once, /ready once loaded
+    warmup = None
+    if settings.MODEL_WARMUP:
+        warmup = asyncio.create_task(
+            asyncio.to_thread(registry.warmup, settings.MODEL_WARMUP)
+        )
+        # A failed load shows up in /ready; don't leave the error unretrieved
+        warmup.add_done_callback(lambda t: t.cancelled() or t.exception())
+    yield
+    await stop_workers()
+    shutdown_pool()
+    # Let queued overlays / debug images reach disk before exiting
+    await asyncio.to_thread(artifact_writer.stop)
+
 
 app = FastAPI(
     title="Angio AI Platform",
     description="AI-assisted angiography analysis & reporting",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Register routes
 app.include_router(router)
 
-app.mount("/storage", StaticFiles(directory="storage"), name="storage")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000","*"],  # or ["*"] for dev
@@ -22,6 +50,42 @@ app.add_middleware(
     allow_methods=["*"],   # VERY IMPORTANT
     allow_headers=["*"],
 )
+
+HTTP_REQUEST_SECONDS = histogram(
+    "http_request_seconds",
+    "Request handling time by method, route template and status",
+    ("method", "route", "status"),
+)
+
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path: keeps label cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method,
+            route.path if route is not None else "unmatched",
+            str(status),
+        )
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    # Opt-in: admin header or PROFILE_SAMPLE_RATE; nothing is sampled otherwise
+    if not profiling.wants_profile(request.headers):
+        return await call_next(request)
+
+    async with profiling.profile(f"{request.method} {request.url.path}") as filename:
+        response = await call_next(request)
+    if filename:
+        response.headers["X-Profile-Id"] = filename
+    return response
 @app.get("/health")
 def health_check():
     return {
@@ -29,3 +93,20 @@ def health_check():
         "service": "angio-ai",
         "env": settings.ENV
     }
+
+@app.get("/ready")
+def readiness_check():
+    # Liveness is /health; this says whether the worker can take inference
+    ready = workers_running() and registry.ready(settings.MODEL_WARMUP)
+    return JSONResponse(
+        {"status": "ready" if ready else "starting", "models": registry.status()},
+        status_code=200 if ready else 503,
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text exposition format (per worker process)
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
@@ -0,0 +1,72 @@
+"""baseline schema
+
+Tables as they existed before migrations were introduced. Databases
+that already have them should be stamped, not upgraded:
+
+    alembic stamp 0001_baseline
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "patients",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "studies",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("patient_id", UUID(as_uuid=True), sa.ForeignKey("patients.id")),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "images",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("study_id", UUID(as_uuid=True), sa.ForeignKey("studies.id")),
+        sa.Column("file_path", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "findings",
+        sa.Column("image_id", UUID(as_uuid=True), sa.ForeignKey("images.id"), primary_key=True),
+        sa.Column("artery", sa.Text(), nullable=False),
+        sa.Column("blockage_pct", sa.Integer(), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("explanation", sa.Text(), nullable=True),
+        sa.Column("heatmap_path", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "decisions",
+        sa.Column("study_id", UUID(as_uuid=True), sa.ForeignKey("studies.id"), primary_key=True),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("feedback", sa.Text(), nullable=True),
+        sa.Column("decided_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.CheckConstraint(
+            "status IN ('pending', 'accepted', 'rejected')",
+            name="decision_status_check",
+        ),
+    )
+    op.create_table(
+        "reports",
+        sa.Column("study_id", UUID(as_uuid=True), sa.ForeignKey("studies.id"), primary_key=True),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    for table in ("reports", "decisions", "findings", "images", "studies", "patients"):
+        op.drop_table(table)
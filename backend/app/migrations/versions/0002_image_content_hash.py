@@ -0,0 +1,28 @@
+"""images.content_hash, findings.pipeline_version
+
+sha256 of the stored blob, written by the content-addressed upload path
+and used to reuse findings across studies; a finding is only reused
+when it was produced by the current pipeline version.
+
+Revision ID: 0002_image_content_hash
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_image_content_hash"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("images", sa.Column("content_hash", sa.Text(), nullable=True))
+    # Existing findings stay NULL: never reused
+    op.add_column("findings", sa.Column("pipeline_version", sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("findings", "pipeline_version")
+    op.drop_column("images", "content_hash")
@@ -0,0 +1,74 @@
+"""patient_summaries
+
+One dashboard row per patient, maintained by summary_service in the
+transaction of every write that changes it, and backfilled here.
+
+Revision ID: 0002b_patient_summaries
+Revises: 0002_image_content_hash
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0002b_patient_summaries"
+down_revision = "0002_image_content_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "patient_summaries",
+        sa.Column("patient_id", UUID(as_uuid=True), sa.ForeignKey("patients.id"), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("scans", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("inferred_scans", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("decision_status", sa.Text(), nullable=False, server_default="pending"),
+        sa.Column("report_generated", sa.Boolean(), nullable=False, server_default="false"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+    # Backfill one row per existing patient (same rules as summary_service)
+    op.execute("""
+        INSERT INTO patient_summaries (
+            patient_id, name, created_at, scans, inferred_scans,
+            decision_status, report_generated, updated_at
+        )
+        SELECT
+            p.id,
+            p.name,
+            COALESCE(p.created_at, now()),
+            COALESCE(counts.scans, 0),
+            COALESCE(counts.inferred_scans, 0),
+            COALESCE(latest.decision_status, 'pending'),
+            COALESCE(latest.report_generated, false),
+            now()
+        FROM patients p
+        LEFT JOIN (
+            SELECT
+                s.patient_id,
+                COUNT(i.id) AS scans,
+                COUNT(DISTINCT f.image_id) AS inferred_scans
+            FROM studies s
+            JOIN images i ON i.study_id = s.id
+            LEFT JOIN findings f ON f.image_id = i.id
+            GROUP BY s.patient_id
+        ) counts ON counts.patient_id = p.id
+        LEFT JOIN LATERAL (
+            SELECT
+                d.status AS decision_status,
+                r.study_id IS NOT NULL AS report_generated
+            FROM studies s
+            LEFT JOIN decisions d ON d.study_id = s.id
+            LEFT JOIN reports r ON r.study_id = s.id
+            WHERE s.patient_id = p.id
+            ORDER BY s.created_at DESC
+            LIMIT 1
+        ) latest ON true
+    """)
+
+
+def downgrade():
+    op.drop_table("patient_summaries")
@@ -0,0 +1,51 @@
+"""secondary / covering indexes for hot queries
+
+    images(study_id) INCLUDE (id, file_path, content_hash)
+        findings-view, run_inference_for_study, generate_report_for_study
+    images(content_hash) INCLUDE (id, study_id)
+        upload dedup / findings reuse
+    studies(patient_id, created_at)
+        summary refresh (counts + latest study)
+    patient_summaries(created_at, patient_id)
+        dashboard keyset pagination
+
+findings / decisions / reports are keyed by their FK already (PK index).
+Built CONCURRENTLY so upgrading a live database does not block writes.
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002b_patient_summaries
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003_hot_query_indexes"
+down_revision = "0002b_patient_summaries"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_images_study_id", "images", ["study_id"], ["id", "file_path", "content_hash"]),
+    ("ix_images_content_hash", "images", ["content_hash"], ["id", "study_id"]),
+    ("ix_studies_patient_id_created_at", "studies", ["patient_id", "created_at"], None),
+    ("ix_patient_summaries_created_at_patient_id", "patient_summaries", ["created_at", "patient_id"], None),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_include=include or [],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
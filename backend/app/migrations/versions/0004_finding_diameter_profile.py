@@ -0,0 +1,23 @@
+"""findings.diameter_profile
+
+Revision ID: 0004_finding_diameter_profile
+Revises: 0003_hot_query_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0004_finding_diameter_profile"
+down_revision = "0003_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable, no default: existing rows keep NULL until re-inferred
+    op.add_column("findings", sa.Column("diameter_profile", JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("findings", "diameter_profile")
@@ -0,0 +1,30 @@
+"""findings: one row per lesion, keyed by (image_id, lesion_index)
+
+Revision ID: 0005_multi_lesion_findings
+Revises: 0004_finding_diameter_profile
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_multi_lesion_findings"
+down_revision = "0004_finding_diameter_profile"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows were the first (most confident) detection
+    op.add_column(
+        "findings",
+        sa.Column("lesion_index", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.drop_constraint("findings_pkey", "findings", type_="primary")
+    op.create_primary_key("findings_pkey", "findings", ["image_id", "lesion_index"])
+
+
+def downgrade():
+    op.execute("DELETE FROM findings WHERE lesion_index > 0")
+    op.drop_constraint("findings_pkey", "findings", type_="primary")
+    op.create_primary_key("findings_pkey", "findings", ["image_id"])
+    op.drop_column("findings", "lesion_index")
@@ -0,0 +1,23 @@
+"""findings.geometry (overlays are rendered on request)
+
+Revision ID: 0006_finding_geometry
+Revises: 0005_multi_lesion_findings
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0006_finding_geometry"
+down_revision = "0005_multi_lesion_findings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Older rows keep their pre-rendered heatmap_path image
+    op.add_column("findings", sa.Column("geometry", JSONB(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("findings", "geometry")
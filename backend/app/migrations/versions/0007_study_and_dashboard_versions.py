@@ -0,0 +1,42 @@
+"""studies.version and dashboard_version
+
+    studies.version                     findings-view ETag
+    dashboard_version (one row)         dashboard ETag
+
+Both are bumped in the transaction of the write they describe, so a
+reader never sees a new version without its rows and versions only move
+forward (unlike a max(updated_at) watermark: clock_timestamp() is taken
+before commit, so a later commit can carry an earlier time).
+
+Revision ID: 0007_study_and_dashboard_versions
+Revises: 0006_finding_geometry
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_study_and_dashboard_versions"
+down_revision = "0006_finding_geometry"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Constant default: no table rewrite on PostgreSQL 11+
+    op.add_column(
+        "studies",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    op.create_table(
+        "dashboard_version",
+        sa.Column("id", sa.Boolean(), primary_key=True, server_default=sa.true()),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.CheckConstraint("id", name="ck_dashboard_version_single_row"),
+    )
+    op.execute("INSERT INTO dashboard_version (id, version) VALUES (true, 0)")
+
+
+def downgrade():
+    op.drop_table("dashboard_version")
+    op.drop_column("studies", "version")
@@ -0,0 +1,38 @@
+"""inference_jobs
+
+Background job state, shared by every API worker process (the job runs
+in the process that accepted it; any process can report on it).
+
+Revision ID: 0008_inference_jobs
+Revises: 0007_study_and_dashboard_versions
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+revision = "0008_inference_jobs"
+down_revision = "0007_study_and_dashboard_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "inference_jobs",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("study_id", UUID(as_uuid=True), sa.ForeignKey("studies.id"), nullable=False),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("images", JSONB(), nullable=False, server_default="{}"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("profile_id", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_inference_jobs_finished_at", "inference_jobs", ["finished_at"])
+
+
+def downgrade():
+    op.drop_index("ix_inference_jobs_finished_at", table_name="inference_jobs")
+    op.drop_table("inference_jobs")
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, Float, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from db.base import Base
 
 class Finding(Base):
@@ -10,6 +10,8 @@ class Finding(Base):
         ForeignKey("images.id"),
         primary_key=True,
     )
+    # One row per detected lesion; 0 is the most confident detection
+    lesion_index = Column(Integer, primary_key=True, default=0)
 
     artery = Column(Text, nullable=False)
     blockage_pct = Column(Integer, nullable=False)
@@ -17,3 +19,14 @@ class Finding(Base):
 
     explanation = Column(Text, nullable=True)
     heatmap_path = Column(Text, nullable=True)
+
+    # Diameter along the lesion centerline (see stenosis_service.diameter_profile)
+    diameter_profile = Column(JSONB, nullable=True)
+
+    # Box / ROI / min & ref points in frame pixels, percent, cine frame
+    # index; overlays are rendered from this on request (overlay_service)
+    geometry = Column(JSONB, nullable=True)
+
+    # pipeline.pipeline_version() that produced the row; findings are only
+    # reused for identical content under the same version (NULL: never)
+    pipeline_version = Column(Text, nullable=True)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, DateTime, ForeignKey, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from db.base import Base
@@ -10,4 +10,18 @@ class Image(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     study_id = Column(UUID(as_uuid=True), ForeignKey("studies.id"))
     file_path = Column(Text, nullable=False)
+    # sha256 of the stored blob; rows with the same hash share one file
+    content_hash = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+
+    # See migrations/versions/0003_hot_query_indexes.py
+    __table_args__ = (
+        Index(
+            "ix_images_study_id", "study_id",
+            postgresql_include=["id", "file_path", "content_hash"],
+        ),
+        Index(
+            "ix_images_content_hash", "content_hash",
+            postgresql_include=["id", "study_id"],
+        ),
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from db.base import Base
+
+class InferenceJob(Base):
+    """
+    State of one background inference job (services/job_service.py).
+
+    Kept in the database, not only in the worker process that runs the
+    job, so GET /jobs/{id} answers from any API worker.
+    """
+    __tablename__ = "inference_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    study_id = Column(UUID(as_uuid=True), ForeignKey("studies.id"), nullable=False)
+
+    status = Column(Text, nullable=False)   # queued | running | completed | failed
+    images = Column(JSONB, nullable=False, server_default="{}")  # image_id -> status
+    error = Column(Text, nullable=True)
+    profile_id = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Retention sweep (finished_at < cutoff)
+        Index("ix_inference_jobs_finished_at", "finished_at"),
+    )
@@ -0,0 +1,45 @@
+from sqlalchemy import BigInteger, CheckConstraint, Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Index, true
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from db.base import Base
+
+class PatientSummary(Base):
+    """
+    One dashboard row per patient, maintained on write
+    (see services/summary_service.py) instead of aggregated per request.
+    """
+    __tablename__ = "patient_summaries"
+
+    patient_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("patients.id"),
+        primary_key=True,
+    )
+
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)  # patient created_at, keyset order
+
+    scans = Column(Integer, nullable=False, server_default="0")
+    inferred_scans = Column(Integer, nullable=False, server_default="0")
+    decision_status = Column(Text, nullable=False, server_default="pending")  # latest study
+    report_generated = Column(Boolean, nullable=False, server_default="false")  # latest study
+
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_patient_summaries_created_at_patient_id", "created_at", "patient_id"),
+    )
+
+
+class DashboardVersion(Base):
+    """
+    Single row bumped with every patient_summaries write (dashboard ETag).
+    """
+    __tablename__ = "dashboard_version"
+
+    id = Column(Boolean, primary_key=True, server_default=true())
+    version = Column(BigInteger, nullable=False, server_default="0")
+
+    __table_args__ = (
+        CheckConstraint("id", name="ck_dashboard_version_single_row"),
+    )
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from db.base import Base
@@ -10,3 +10,9 @@ class Study(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"))
     created_at = Column(DateTime, server_default=func.now())
+    # Bumped whenever the study's findings change (ETag of findings-view)
+    version = Column(Integer, nullable=False, server_default="0")
+
+    __table_args__ = (
+        Index("ix_studies_patient_id_created_at", "patient_id", "created_at"),
+    )
@@ -1,6 +1,6 @@
 # app/schemas/dashboard.py
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class DashboardPatient(BaseModel):
     patient_id: str
@@ -13,3 +13,4 @@ class DashboardPatient(BaseModel):
 
 class DashboardResponse(BaseModel):
     patients: List[DashboardPatient]
+    next_cursor: Optional[str] = None   # pass back as ?cursor= for the next page
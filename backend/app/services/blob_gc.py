@@ -0,0 +1,94 @@
+# app/services/blob_gc.py
+"""
+Garbage collection of unreferenced upload blobs.
+
+Blobs are content-addressed and shared between images, so the request
+path never deletes them (a concurrent upload of the same content may
+be about to reference one). Blobs no `images.content_hash` refers to
+are removed here instead, once older than BLOB_GC_MIN_AGE_HOURS; an
+upload that reuses a blob touches it, so in-flight uploads keep theirs.
+
+    python -m services.blob_gc [--dry-run]
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from sqlalchemy import select
+
+from core.config import settings
+from db.session import AsyncSessionLocal, engine, track_queries
+from models.image import Image
+
+_CHUNK = 500
+
+
+def _old_blobs(root, cutoff):
+    """content hash -> blob paths last touched before `cutoff`."""
+    blobs = {}
+    for path in root.glob("*/*"):
+        if path.name.endswith(".part"):
+            continue
+        try:
+            if path.stat().st_mtime < cutoff:
+                blobs.setdefault(path.stem, []).append(path)
+        except FileNotFoundError:
+            continue
+    return blobs
+
+
+def _unlink_if_untouched(paths, cutoff):
+    removed = 0
+    for path in paths:
+        try:
+            # Re-check: an upload may have reused the blob since the scan
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+@track_queries
+async def collect_orphan_blobs(db, min_age_hours=None, dry_run=False):
+    """Delete old blobs no image references; returns the number removed (or found)."""
+    hours = settings.BLOB_GC_MIN_AGE_HOURS if min_age_hours is None else min_age_hours
+    cutoff = time.time() - hours * 3600
+    root = Path(settings.DICOM_STORAGE_PATH) / "blobs"
+
+    blobs = await asyncio.to_thread(_old_blobs, root, cutoff)
+    hashes = list(blobs)
+
+    orphans = []
+    for i in range(0, len(hashes), _CHUNK):
+        chunk = hashes[i:i + _CHUNK]
+        referenced = set((
+            await db.execute(
+                select(Image.content_hash).where(Image.content_hash.in_(chunk)).distinct()
+            )
+        ).scalars())
+        orphans += [path for h in chunk if h not in referenced for path in blobs[h]]
+
+    if dry_run:
+        return len(orphans)
+    return await asyncio.to_thread(_unlink_if_untouched, orphans, cutoff)
+
+
+async def _main(args):
+    async with AsyncSessionLocal() as db:
+        count = await collect_orphan_blobs(db, args.min_age_hours, args.dry_run)
+    await engine.dispose()
+    print(f"{'found' if args.dry_run else 'removed'} {count} orphan blob(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-age-hours", type=float, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
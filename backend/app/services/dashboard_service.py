@@ -1,35 +1,66 @@
+import base64
+from datetime import datetime
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from db.session import track_queries
 
-async def fetch_dashboard(db: AsyncSession):
-    query = text("""
+
+def encode_cursor(row) -> str:
+    raw = f"{row.created_at.isoformat()}|{row.patient_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, patient_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(patient_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+@track_queries
+async def fetch_dashboard(db: AsyncSession, limit: int = 50, cursor: str | None = None):
+    """
+    One page of per-patient rows, newest first.
+
+    Keyset pagination on (created_at, patient_id) over patient_summaries:
+    each page is an index range scan, independent of the patient count.
+    Returns (rows, next_cursor).
+    """
+    params = {"limit": limit + 1}
+    where = ""
+    if cursor:
+        params["c_created_at"], params["c_patient_id"] = decode_cursor(cursor)
+        where = "WHERE (ps.created_at, ps.patient_id) < (:c_created_at, :c_patient_id)"
+
+    query = text(f"""
         SELECT
-            p.id AS patient_id,
-            p.name AS name,
-            COUNT(i.id) AS scans,
+            ps.patient_id,
+            ps.name,
+            ps.created_at,
+            ps.scans,
 
             CASE
-                WHEN COUNT(f.image_id) > 0 THEN 'completed'
+                WHEN ps.inferred_scans > 0 THEN 'completed'
                 ELSE 'not_started'
             END AS inference_status,
 
-            COALESCE(d.status, 'pending') AS decision_status,
+            ps.decision_status,
+            ps.report_generated
 
-            CASE
-                WHEN r.study_id IS NOT NULL THEN true
-                ELSE false
-            END AS report_generated
-
-        FROM patients p
-        LEFT JOIN studies s ON s.patient_id = p.id
-        LEFT JOIN images i ON i.study_id = s.id
-        LEFT JOIN findings f ON f.image_id = i.id
-        LEFT JOIN decisions d ON d.study_id = s.id
-        LEFT JOIN reports r ON r.study_id = s.id
-
-        GROUP BY p.id, p.name, d.status, r.study_id
-        ORDER BY p.created_at DESC
+        FROM patient_summaries ps
+        {where}
+        ORDER BY ps.created_at DESC, ps.patient_id DESC
+        LIMIT :limit
     """)
 
-    result = await db.execute(query)
-    return result.fetchall()
+    rows = (await db.execute(query, params)).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+
+    return rows, next_cursor
@@ -1,7 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from models.decision import Decision
+from services.summary_service import refresh_summary_for_study
+from db.session import track_queries
 
+@track_queries
 async def accept_study(db: AsyncSession, study_id):
     result = await db.execute(
         select(Decision).where(Decision.study_id == study_id)
@@ -21,9 +24,12 @@ async def accept_study(db: AsyncSession, study_id):
         )
         db.add(decision)
 
+    await db.flush()
+    await refresh_summary_for_study(db, study_id)
     await db.commit()
 
 
+@track_queries
 async def reject_study(db: AsyncSession, study_id, reason: str):
     result = await db.execute(
         select(Decision).where(Decision.study_id == study_id)
@@ -41,4 +47,6 @@ async def reject_study(db: AsyncSession, study_id, reason: str):
         )
         db.add(decision)
 
+    await db.flush()
+    await refresh_summary_for_study(db, study_id)
     await db.commit()
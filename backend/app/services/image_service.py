@@ -0,0 +1,135 @@
+import os
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+import xxhash
+
+from core.config import settings
+from services.stenosis_pipeline.artifact_writer import QUALITY_FLAGS
+from services.stenosis_pipeline.dicom_reader import DicomFrameReader, is_dicom
+
+LEVELS = ("thumb", "preview", "full")
+
+MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+}
+
+# Striped locks: two requests for the same cold image build it once
+_build_locks = [threading.Lock() for _ in range(64)]
+
+
+def level_side(level):
+    return {
+        "thumb": settings.IMAGE_THUMB_SIDE,
+        "preview": settings.IMAGE_PREVIEW_SIDE,
+    }.get(level)
+
+
+def load_image(file_path, frame_index=None):
+    """BGR image for a stored file; DICOM cines default to the middle frame."""
+    if is_dicom(file_path):
+        reader = DicomFrameReader(file_path)
+        if frame_index is None:
+            frame_index = len(reader) // 2
+        return reader.frame_bgr(frame_index)
+
+    image = cv2.imread(file_path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Cannot decode {file_path}")
+    return image
+
+
+def fit(image, side):
+    """Downscale so the longest side is at most `side` (never upscale)."""
+    h, w = image.shape[:2]
+    if side is None or max(h, w) <= side:
+        return image
+    scale = side / max(h, w)
+    return cv2.resize(
+        image, (max(1, round(w * scale)), max(1, round(h * scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def encode(image, fmt):
+    ok, encoded = cv2.imencode(
+        f".{fmt}", image, [QUALITY_FLAGS[fmt], settings.ARTIFACT_QUALITY[fmt]]
+    )
+    if not ok:
+        raise ValueError(f"Cannot encode image as {fmt}")
+    return np.asarray(encoded).tobytes()
+
+
+def pyramid_key(file_path, content_hash=None):
+    """
+    Stable name for a source's pyramid.
+
+    Blobs are content-addressed, so their sha256 is the key; legacy files
+    fall back to path + mtime. Level sizes and format are folded in so
+    changing them builds (and ETags) a fresh pyramid.
+    """
+    source = content_hash or f"{file_path}:{os.stat(file_path).st_mtime_ns}"
+    return xxhash.xxh3_128_hexdigest(
+        f"{source}|{settings.IMAGE_THUMB_SIDE}|{settings.IMAGE_PREVIEW_SIDE}"
+        f"|{settings.IMAGE_PYRAMID_FORMAT}".encode()
+    )
+
+
+def _level_path(key, level):
+    # Full resolution stays lossless
+    fmt = "png" if level == "full" else settings.IMAGE_PYRAMID_FORMAT
+    return Path(settings.IMAGE_PYRAMID_DIR) / key[:2] / f"{key}_{level}.{fmt}"
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _build(file_path, key):
+    # One decode serves every level; each level is resized from the
+    # previous (larger) one, which is cheaper than from the original
+    image = load_image(file_path)
+    dicom = is_dicom(file_path)
+
+    for level in reversed(LEVELS):
+        if level == "full":
+            if dicom:
+                _write_atomic(_level_path(key, level), encode(image, "png"))
+            continue
+        image = fit(image, level_side(level))
+        path = _level_path(key, level)
+        _write_atomic(path, encode(image, path.suffix[1:]))
+
+
+def pyramid_level(file_path, level, content_hash=None):
+    """
+    Path of the file to serve for `level`, building the pyramid on first use.
+
+    Full resolution of browser-readable originals is the original file
+    itself; DICOM sources get a PNG render (the browser cannot show DICOM).
+    Blocking: call from a worker thread.
+    """
+    if level == "full" and not is_dicom(file_path):
+        return Path(file_path), pyramid_key(file_path, content_hash)
+
+    key = pyramid_key(file_path, content_hash)
+    path = _level_path(key, level)
+
+    if not path.exists():
+        with _build_locks[int(key[:8], 16) % len(_build_locks)]:
+            if not path.exists():
+                _build(file_path, key)
+
+    return path, key
+
+
+def media_type(path):
+    return MEDIA_TYPES.get(Path(path).suffix.lower(), "application/octet-stream")
@@ -1,55 +1,291 @@
-from sqlalchemy import select
+import asyncio
+import logging
+import time
+from sqlalchemy import select, delete, and_, or_
 from sqlalchemy.dialects.postgresql import insert
 from models.image import Image
 from models.finding import Finding
-from services.stenosis_pipeline.pipeline import run_stenosis_pipeline
+from services.stenosis_pipeline.pipeline import pipeline_version, run_file_pipeline
+from services.stenosis_pipeline.artery_vision_service import artery_for_roi
+from services.summary_service import refresh_summary_for_study, bump_study_version
+from core import profiling
+from core.config import settings
+from core.metrics import counter, histogram
 import os
+from db.session import track_queries
 
+logger = logging.getLogger(__name__)
+
+# process() outcome for an image whose pipeline raised
+_FAILED = object()
+
+IMAGES_PROCESSED = counter(
+    "inference_images_total",
+    "Images finished by inference, by outcome (done | reused | no_detection | failed)",
+    ("outcome",),
+)
+DETECTIONS = counter(
+    "inference_detections_total",
+    "Lesions detected, by severity (Unreliable = no usable measurement)",
+    ("severity",),
+)
+IMAGE_SECONDS = histogram(
+    "inference_image_seconds",
+    "Pipeline + artery classification time per distinct image",
+    ("outcome",),
+)
+
+
+def _finding_values(result, version):
+    """One findings row per lesion, in lesion_index order."""
+    rows = []
+    for lesion in result["lesions"]:
+        # ✅ Fallback rule applied HERE
+        blockage_pct = lesion["stenosis_percent"]
+        if blockage_pct is None:
+            blockage_pct = 0
+
+        rows.append({
+            "lesion_index": lesion["lesion_index"],
+            "artery": lesion["artery"] or "Unknown",
+            "blockage_pct": blockage_pct,
+            "confidence": lesion["confidence"],
+            "explanation": "YOLO + segmentation pipeline",
+            "heatmap_path": None,
+            "diameter_profile": lesion["diameter_profile"],
+            "geometry": lesion["geometry"],
+            "pipeline_version": version,
+        })
+    return rows
+
+
+class FindingsWriter:
+    """
+    Buffers findings and writes them with one multi-row upsert.
+
+    An image's lesions are replaced as a set: rows are upserted on
+    (image_id, lesion_index) and only indexes past the new lesion count
+    are deleted, so a re-run that finds fewer lesions leaves no stale
+    ones behind and a concurrent writer for the same image can never
+    hit a duplicate key between a delete and an insert.
+
+    Flushes when FINDINGS_FLUSH_SIZE rows are buffered or the oldest
+    buffered row is FINDINGS_FLUSH_SECONDS old. Each flush commits
+    together with the study's summary refresh and version bump, so a
+    long run persists progressively, row locks are held for one flush
+    only, and a failing image loses at most the rows buffered since.
+    """
+
+    def __init__(self, db, study_id):
+        self.db = db
+        self.study_id = study_id
+        self._rows = {}  # image_id -> lesion rows (last write wins)
+        self._count = 0
+        self._since = None
+
+    async def add(self, image_id, lesions):
+        if not self._rows:
+            self._since = time.monotonic()
+
+        previous = self._rows.get(image_id, [])
+        self._rows[image_id] = [{"image_id": image_id, **values} for values in lesions]
+        self._count += len(lesions) - len(previous)
+
+        if (
+            self._count >= settings.FINDINGS_FLUSH_SIZE
+            or time.monotonic() - self._since >= settings.FINDINGS_FLUSH_SECONDS
+        ):
+            await self.flush()
+
+    async def flush(self):
+        if not self._rows:
+            return
+
+        batch, self._rows, self._count = self._rows, {}, 0
+
+        rows = [row for lesions in batch.values() for row in lesions]
+        if rows:
+            stmt = insert(Finding).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Finding.image_id, Finding.lesion_index],
+                set_={c: stmt.excluded[c] for c in rows[0] if c not in ("image_id", "lesion_index")},
+            )
+            await self.db.execute(stmt)
+
+        # Lesions a previous run found beyond this run's count
+        by_count = {}
+        for image_id, lesions in batch.items():
+            by_count.setdefault(len(lesions), []).append(image_id)
+        await self.db.execute(
+            delete(Finding).where(or_(*(
+                and_(Finding.image_id.in_(image_ids), Finding.lesion_index >= count)
+                for count, image_ids in by_count.items()
+            )))
+        )
+
+        await refresh_summary_for_study(self.db, self.study_id)
+        await bump_study_version(self.db, self.study_id)
+        await self.db.commit()
+
+
+async def _known_findings(db, study_id, content_hashes, version):
+    """Findings already computed for the same content, by this pipeline version, in other studies."""
+    if not content_hashes:
+        return {}
+
+    rows = (
+        await db.execute(
+            select(Image.content_hash, Finding)
+            .join(Finding, Finding.image_id == Image.id)
+            .where(
+                Image.content_hash.in_(content_hashes),
+                Image.study_id != study_id,
+                Finding.pipeline_version == version,
+            )
+            .order_by(Finding.image_id, Finding.lesion_index)
+        )
+    ).all()
+
+    # content hash -> one source image's lesions (any copy will do)
+    known, source = {}, {}
+    for content_hash, f in rows:
+        if source.setdefault(content_hash, f.image_id) != f.image_id:
+            continue
+        known.setdefault(content_hash, []).append({
+            "lesion_index": f.lesion_index,
+            "artery": f.artery,
+            "blockage_pct": f.blockage_pct,
+            "confidence": f.confidence,
+            "explanation": f.explanation,
+            "heatmap_path": f.heatmap_path,
+            "diameter_profile": f.diameter_profile,
+            "geometry": f.geometry,
+            "pipeline_version": f.pipeline_version,
+        })
+    return known
+
+
+@track_queries
+async def run_inference_for_study(db, study_id, executor=None, on_progress=None):
+    """
+    Run the stenosis pipeline for every image of a study.
+
+    The pipeline is synchronous and CPU-bound, so it runs on `executor`
+    (the loop's default executor when None) to keep the event loop free.
+    Images whose content was already analysed in another study reuse
+    those findings, and duplicates within the study run only once.
+    `on_progress(image_id, status)` is called as each image moves through
+    running -> done / reused / no_detection / failed.
+
+    An image that fails is logged and reported as failed; the others
+    carry on. Returns the number of failed images.
+    """
+    loop = asyncio.get_running_loop()
+
+    def progress(group, status):
+        if status in ("done", "reused", "no_detection", "failed"):
+            IMAGES_PROCESSED.inc(status, amount=len(group))
+        if on_progress:
+            for img in group:
+                on_progress(img.id, status)
 
-async def run_inference_for_study(db, study_id):
     images = (
         await db.execute(
             select(Image).where(Image.study_id == study_id)
         )
     ).scalars().all()
 
+    progress(images, "pending")
+
+    # content hash -> images sharing it (legacy rows without a hash stand alone)
+    groups = {}
     for img in images:
-        with open(img.file_path, "rb") as f:
-            image_bytes = f.read()
+        groups.setdefault(img.content_hash or img.id, []).append(img)
 
-        result = run_stenosis_pipeline(
-            image_bytes=image_bytes,
-            image_name=os.path.basename(img.file_path),
-        )
+    version = await asyncio.to_thread(pipeline_version)
+    known = await _known_findings(
+        db, study_id, [img.content_hash for img in images if img.content_hash], version
+    )
 
-        if not result:
-            continue
+    writer = FindingsWriter(db, study_id)
 
-        # ✅ Fallback rule applied HERE
-        blockage_pct = result["stenosis_percent"]
-        if blockage_pct is None:
-            blockage_pct = 0
+    pending = []
+    for key, group in groups.items():
+        if key in known:
+            for img in group:
+                await writer.add(img.id, known[key])
+            progress(group, "reused")
+        else:
+            pending.append(group)
 
-        stmt = (
-            insert(Finding)
-            .values(
-                image_id=img.id,
-                artery=result["artery"] or "Unknown",
-                blockage_pct=blockage_pct,
-                confidence=result["confidence"],
-                explanation="YOLO + segmentation pipeline",
-                heatmap_path=result["yolo_visual_path"],
-            )
-            .on_conflict_do_update(
-                index_elements=[Finding.image_id],
-                set_={
-                    "artery": result["artery"] or "Unknown",
-                    "blockage_pct": blockage_pct,
-                    "confidence": result["confidence"],
-                    "heatmap_path": result["yolo_visual_path"],
-                },
+    # Several images in flight so the CPU pool stays busy;
+    # DB writes stay on this coroutine (AsyncSession is not concurrent-safe)
+    limit = asyncio.Semaphore(
+        settings.INFERENCE_IMAGE_CONCURRENCY or os.cpu_count() or 1
+    )
+
+    async def process(group):
+        async with limit:
+            progress(group, "running")
+            start = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(
+                    executor, profiling.bind(run_file_pipeline), group[0].file_path
+                )
+
+                # ---------- Artery classification ----------
+                # Awaited here so the remote calls overlap with the
+                # CPU stages of other images; one call per annotated ROI,
+                # shared by the lesions segmented in it
+                if result:
+                    rois = result["annotated_rois"]
+                    names = await asyncio.gather(*(
+                        artery_for_roi(
+                            {**roi, "render": profiling.bind(roi["render"])}, executor
+                        )
+                        for roi in rois if roi is not None
+                    ))
+                    arteries = iter(names)
+                    by_roi = [next(arteries) if roi is not None else None for roi in rois]
+                    for lesion in result["lesions"]:
+                        lesion["artery"] = by_roi[lesion["roi_index"]]
+            except Exception:
+                logger.exception("inference failed for image %s", group[0].id)
+                IMAGE_SECONDS.observe(time.perf_counter() - start, "failed")
+                progress(group, "failed")
+                return group, _FAILED
+            IMAGE_SECONDS.observe(
+                time.perf_counter() - start, "done" if result else "no_detection"
             )
-        )
-        await db.execute(stmt)
+            return group, result
+
+    tasks = [asyncio.create_task(process(group)) for group in pending]
+    failed = 0
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            group, result = await next_done
+
+            if result is _FAILED:
+                failed += len(group)
+                continue
+
+            if not result:
+                progress(group, "no_detection")
+                continue
+
+            for lesion in result["lesions"]:
+                DETECTIONS.inc(lesion["severity"])
+
+            values = _finding_values(result, version)
+            for img in group:
+                await writer.add(img.id, values)
+
+            progress(group, "done")
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
 
-    await db.commit()
+    await writer.flush()
+    return failed
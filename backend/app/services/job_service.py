@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from core import profiling
+from core.config import settings
+from core.metrics import gauge
+from db.session import AsyncSessionLocal
+from models.inference_job import InferenceJob
+from services.inference_service import run_inference_for_study
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# Jobs queued or running in *this* process (job_id -> state). The
+# inference_jobs table is the record every API worker reads.
+jobs: dict[str, dict] = {}
+
+_queue: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+_executor: ThreadPoolExecutor | None = None
+
+INFERENCE_JOBS = gauge("inference_jobs", "Inference jobs by status", ("status",))
+INFERENCE_JOBS.set_function(lambda: _queue.qsize() if _queue else 0, "queued")
+INFERENCE_JOBS.set_function(
+    lambda: sum(job["status"] == "running" for job in list(jobs.values())), "running"
+)
+
+_COLUMNS = (
+    "study_id", "status", "images", "error", "profile_id",
+    "created_at", "started_at", "finished_at",
+)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+async def _save(job, db=None):
+    """Upsert the job's current state (own session unless `db` is given)."""
+    values = {"id": uuid.UUID(job["job_id"]), **{c: job[c] for c in _COLUMNS}}
+    values["images"] = dict(job["images"])  # still being updated by the run
+    stmt = insert(InferenceJob).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[InferenceJob.id],
+        set_={c: stmt.excluded[c] for c in _COLUMNS if c != "created_at"},
+    )
+
+    if db is not None:
+        await db.execute(stmt)
+        return
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+async def enqueue_inference(study_id) -> dict:
+    if _queue is None:
+        raise RuntimeError("Inference workers are not running")
+    if _queue.full():
+        raise QueueFullError("Inference queue is full")
+
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "study_id": str(study_id),
+        "status": "queued",
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+        "error": None,
+        "images": {},
+        # A profiled run-inference request profiles the job it queues
+        "profile": profiling.requested(),
+        "profile_id": None,
+    }
+
+    # Recorded before it can start, so no later state is overwritten
+    async with AsyncSessionLocal() as db:
+        await _save(job, db)
+        cutoff = _now() - timedelta(hours=settings.INFERENCE_JOB_RETENTION_HOURS)
+        await db.execute(delete(InferenceJob).where(InferenceJob.finished_at < cutoff))
+        await db.commit()
+
+    try:
+        _queue.put_nowait(job)
+    except asyncio.QueueFull:
+        # Filled up while the row was being written
+        job.update(status="failed", error="Inference queue is full", finished_at=_now())
+        await _save(job)
+        raise QueueFullError("Inference queue is full")
+
+    jobs[job["job_id"]] = job
+    return job
+
+
+async def get_job(job_id: str) -> dict | None:
+    job = jobs.get(job_id)
+    if job is not None:
+        return job
+
+    try:
+        key = uuid.UUID(job_id)
+    except ValueError:
+        return None
+    async with AsyncSessionLocal() as db:
+        row = await db.get(InferenceJob, key)
+    if row is None:
+        return None
+    return {"job_id": job_id, **{c: getattr(row, c) for c in _COLUMNS}}
+
+
+def job_progress(job: dict) -> dict:
+    statuses = list(job["images"].values())
+    finished = sum(s in ("done", "reused", "no_detection", "failed") for s in statuses)
+    return {"total": len(statuses), "processed": finished}
+
+
+@asynccontextmanager
+async def _maybe_profile(job):
+    if not job["profile"]:
+        yield
+        return
+    async with profiling.profile(f"job {job['study_id']}") as filename:
+        job["profile_id"] = filename
+        yield
+
+
+async def _sync_progress(job):
+    # Per-image progress is saved periodically, not on every change
+    while True:
+        await asyncio.sleep(settings.INFERENCE_JOB_SYNC_SECONDS)
+        try:
+            await _save(job)
+        except Exception:
+            # Best effort: the final state is saved when the job ends
+            logger.exception("saving progress of job %s failed", job["job_id"])
+
+
+async def _run_job(job):
+    job["status"] = "running"
+    job["started_at"] = _now()
+
+    def on_progress(image_id, status):
+        job["images"][str(image_id)] = status
+
+    sync = asyncio.create_task(_sync_progress(job))
+    try:
+        await _save(job)
+        async with _maybe_profile(job):
+            async with AsyncSessionLocal() as db:
+                failed = await run_inference_for_study(
+                    db,
+                    uuid.UUID(job["study_id"]),
+                    executor=_executor,
+                    on_progress=on_progress,
+                )
+        # Failed images are reported per image; the job fails only if all did
+        total = len(job["images"])
+        if failed:
+            job["error"] = f"{failed} of {total} images failed"
+        job["status"] = "failed" if failed and failed == total else "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        sync.cancel()
+        job["finished_at"] = _now()
+        try:
+            await _save(job)
+        finally:
+            jobs.pop(job["job_id"], None)
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        try:
+            await _run_job(job)
+        finally:
+            _queue.task_done()
+
+
+async def start_workers():
+    global _queue, _executor
+    _queue = asyncio.Queue(maxsize=settings.INFERENCE_QUEUE_SIZE)
+    # Each in-flight image holds a thread while it waits on the CPU pool
+    threads = max(
+        settings.INFERENCE_EXECUTOR_THREADS,
+        settings.INFERENCE_IMAGE_CONCURRENCY or os.cpu_count() or 1,
+    )
+    _executor = ThreadPoolExecutor(
+        max_workers=threads,
+        thread_name_prefix="inference",
+    )
+    for _ in range(settings.INFERENCE_JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+def workers_running() -> bool:
+    return _queue is not None and any(not task.done() for task in _workers)
+
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+    if _executor:
+        _executor.shutdown(wait=False, cancel_futures=True)
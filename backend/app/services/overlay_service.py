@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import xxhash
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import profiling
+from core.config import settings
+from core.metrics import cache_lookup
+from db.session import track_queries
+from models.finding import Finding
+from models.image import Image
+from services.image_service import MEDIA_TYPES, encode, fit, level_side, load_image
+from services.stenosis_pipeline.render_cache import RenderCache
+from services.stenosis_pipeline.stenosis_service import draw_overlay
+
+overlay_cache = RenderCache(settings.OVERLAY_CACHE_BYTES)
+
+
+def _render(file_path, lesions, roi, size):
+    image = load_image(file_path, lesions[0]["frame_index"])
+
+    origin = (0, 0)
+    if roi is not None:
+        x1, y1, x2, y2 = roi
+        image = image[y1:y2, x1:x2]
+        origin = (x1, y1)
+
+    # Drawn at full resolution, then downscaled for thumb / preview
+    vis = fit(draw_overlay(image, lesions, origin), level_side(size))
+    return encode(vis, settings.OVERLAY_FORMAT)
+
+
+@track_queries
+async def render_overlay(db: AsyncSession, image_id, lesion_index=None, size="full"):
+    """
+    Encoded overlay for an image, rendered from stored finding geometry.
+
+    Without `lesion_index`: the whole frame with every lesion drawn.
+    With it: that lesion's ROI, with the lesions segmented in the same ROI.
+    `size` is a pyramid level (thumb / preview / full).
+    Returns (bytes, media type, etag), or None when there is nothing to draw.
+    Renders are kept in a byte-bounded LRU keyed by the geometry itself,
+    so a re-run that changes the findings never serves a stale overlay.
+    """
+    rows = (
+        await db.execute(
+            select(Image.file_path, Finding.lesion_index, Finding.geometry)
+            .join(Finding, Finding.image_id == Image.id)
+            .where(Image.id == image_id)
+            .order_by(Finding.lesion_index)
+        )
+    ).all()
+
+    lesions = {r.lesion_index: r.geometry for r in rows if r.geometry}
+    if not lesions:
+        return None
+
+    roi = None
+    if lesion_index is not None:
+        if lesion_index not in lesions:
+            return None
+        roi = lesions[lesion_index]["roi"]
+        lesions = {i: g for i, g in lesions.items() if g["roi"] == roi}
+
+    file_path = rows[0].file_path
+    drawn = list(lesions.values())
+
+    fmt = settings.OVERLAY_FORMAT
+    etag = xxhash.xxh3_64_hexdigest(
+        json.dumps(
+            [str(image_id), file_path, roi, drawn, size, level_side(size), fmt],
+            sort_keys=True,
+        ).encode()
+    )
+
+    data = overlay_cache.get(etag)
+    cache_lookup("overlay", data is not None)
+    if data is None:
+        # Decode + draw + encode is CPU work; keep it off the event loop
+        data = await asyncio.to_thread(profiling.bind(_render), file_path, drawn, roi, size)
+        overlay_cache.put(etag, data)
+
+    return data, MEDIA_TYPES[f".{fmt}"], etag
+
+
+@track_queries
+async def legacy_heatmap(db: AsyncSession, image_id, lesion_index=None):
+    """Pre-rendered overlay file of findings stored before geometry existed."""
+    stmt = select(Finding.heatmap_path).where(
+        Finding.image_id == image_id,
+        Finding.heatmap_path.isnot(None),
+    )
+    if lesion_index is not None:
+        stmt = stmt.where(Finding.lesion_index == lesion_index)
+    return (await db.execute(stmt.order_by(Finding.lesion_index).limit(1))).scalar()
@@ -1,17 +1,23 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.patient import Patient
+from services.summary_service import refresh_patient_summary
+from db.session import track_queries
 
+@track_queries
 async def create_patient(db: AsyncSession, name: str) -> Patient:
     patient = Patient(
         id=uuid.uuid4(),
         name=name,
     )
     db.add(patient)
+    await db.flush()
+    await refresh_patient_summary(db, patient.id)
     await db.commit()
     await db.refresh(patient)
     return patient
 
 
+@track_queries
 async def get_patient(db: AsyncSession, patient_id: uuid.UUID) -> Patient | None:
     return await db.get(Patient, patient_id)
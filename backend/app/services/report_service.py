@@ -6,8 +6,11 @@ from models.decision import Decision
 from models.finding import Finding
 from models.image import Image
 from models.report import Report
+from services.summary_service import refresh_summary_for_study
+from db.session import track_queries
 
 
+@track_queries
 async def generate_report_for_study(db: AsyncSession, study_id):
     # 1️⃣ Ensure study is accepted
     result = await db.execute(
@@ -50,6 +53,7 @@ async def generate_report_for_study(db: AsyncSession, study_id):
     )
 
     await db.execute(stmt)
+    await refresh_summary_for_study(db, study_id)
     await db.commit()
 
     return {
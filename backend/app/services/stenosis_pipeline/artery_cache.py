@@ -0,0 +1,157 @@
+import os
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import xxhash
+
+from core.config import settings
+
+# Disk eviction scans the directory, so only do it every N writes
+_EVICT_EVERY = 256
+
+
+def cache_key(img, prompt, deployment):
+    h = xxhash.xxh3_128()
+    h.update(prompt.encode("utf-8"))
+    h.update(b"\0")
+    h.update((deployment or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(str(img.shape).encode("ascii"))
+    h.update(np.ascontiguousarray(img).data)
+    return h.hexdigest()
+
+
+def perceptual_hash(img):
+    # 64-bit difference hash: robust to noise / small shifts between cine frames
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class ArteryCache:
+    """
+    Two-tier cache for artery names.
+
+    Memory LRU in front of one small JSON file per key on disk. Disk
+    entries are evicted oldest-mtime first; hits refresh the mtime.
+    """
+
+    def __init__(self, cache_dir, memory_entries, disk_entries, phash_distance=None):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.phash_distance = phash_distance
+
+        self._memory = OrderedDict()   # key -> artery
+        self._phashes = OrderedDict()  # key -> perceptual hash
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key, artery, phash):
+        with self._lock:
+            self._memory[key] = artery
+            self._memory.move_to_end(key)
+            if phash is not None:
+                self._phashes[key] = phash
+                self._phashes.move_to_end(key)
+
+            while len(self._memory) > self.memory_entries:
+                old, _ = self._memory.popitem(last=False)
+                self._phashes.pop(old, None)
+
+    def _nearest(self, phash):
+        with self._lock:
+            for key, other in reversed(self._phashes.items()):
+                if bin(phash ^ other).count("1") <= self.phash_distance:
+                    self._memory.move_to_end(key)
+                    return self._memory[key]
+        return None
+
+    def get(self, key, img=None):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            entry = None
+
+        if entry:
+            self._remember(key, entry["artery"], entry.get("phash"))
+            return entry["artery"]
+
+        if self.phash_distance is not None and img is not None:
+            return self._nearest(perceptual_hash(img))
+
+        return None
+
+    def put(self, key, artery, img=None):
+        phash = perceptual_hash(img) if img is not None else None
+        self._remember(key, artery, phash)
+
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Unique per writer: several processes share the cache directory
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"artery": artery, "phash": phash}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % _EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((os.stat(path).st_mtime, path))
+                    except FileNotFoundError:
+                        pass
+
+        excess = len(entries) - self.disk_entries
+        if excess <= 0:
+            return
+
+        entries.sort()
+        for _, path in entries[:excess]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+artery_cache = ArteryCache(
+    settings.ARTERY_CACHE_DIR,
+    settings.ARTERY_CACHE_MEMORY_ENTRIES,
+    settings.ARTERY_CACHE_DISK_ENTRIES,
+    settings.ARTERY_CACHE_PHASH_DISTANCE,
+)
@@ -1,52 +1,270 @@
 import os
+import re
+import asyncio
+from abc import ABC, abstractmethod
 import base64
+import time
 import cv2
+import numpy as np
+import xxhash
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from core.config import settings
+from core.metrics import cache_lookup, histogram
+from . import stage_cache
+from .artery_cache import artery_cache, cache_key
+from .model_registry import registry
 
 # ✅ LOAD .env VARIABLES
 load_dotenv()
 
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+
+ARTERY_REQUEST_SECONDS = histogram(
+    "artery_request_seconds",
+    "Artery classifier backend round trip, per (batched) request",
+    ("backend", "outcome"),
+)
+
+ARTERIES = ["LAD", "RCA", "LCX", "Left Main", "Other"]
+
+ARTERY_PROMPT = (
+    "This is a coronary angiography image. "
+    "Identify the coronary artery shown "
+    "(LAD, RCA, LCX, Left Main, or Other). "
+    "Reply with only the artery name."
+)
+
+BATCH_PROMPT = (
+    "These are {n} coronary angiography images. "
+    "For each image, identify the coronary artery shown "
+    "(LAD, RCA, LCX, Left Main, or Other). "
+    "Reply with exactly {n} lines, one artery name per line, "
+    "in the same order as the images."
 )
 
-DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
 
 def encode_image(img):
-    _, buffer = cv2.imencode(".png", img)
+    # Downscale + JPEG: the model does not need full-resolution PNGs
+    h, w = img.shape[:2]
+    scale = settings.ARTERY_MAX_SIDE / max(h, w)
+    if scale < 1:
+        img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+    _, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, settings.ARTERY_JPEG_QUALITY])
     return base64.b64encode(buffer).decode("utf-8")
 
-def detect_artery_name(roi_with_box):
-    image_b64 = encode_image(roi_with_box)
-
-    response = client.chat.completions.create(
-        model=DEPLOYMENT,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": (
-                            "This is a coronary angiography image. "
-                            "Identify the coronary artery shown "
-                            "(LAD, RCA, LCX, Left Main, or Other). "
-                            "Reply with only the artery name."
-                        )
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{image_b64}"
-                        }
-                    }
-                ]
-            }
-        ],
-        max_tokens=100
-    )
-
-    return response.choices[0].message.content.strip()
+
+class ArteryClassifier(ABC):
+    """
+    Backend interface: classify a batch of annotated ROIs.
+
+    Implementations must return one artery name per input, in order.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def classify_batch(self, images):
+        ...
+
+
+class AzureArteryClassifier(ArteryClassifier):
+    name = "azure"
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self):
+        # Built on first use, not at import
+        if self._client is None:
+            from openai import AsyncAzureOpenAI
+
+            self._client = AsyncAzureOpenAI(
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                timeout=settings.ARTERY_TIMEOUT_S,
+                max_retries=settings.ARTERY_MAX_RETRIES,
+            )
+        return self._client
+
+    async def _ask(self, prompt, images):
+        payloads = await asyncio.to_thread(lambda: [encode_image(img) for img in images])
+
+        content = [{"type": "text", "text": prompt}]
+        for image_b64 in payloads:
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{image_b64}"
+                }
+            })
+
+        response = await self.client.chat.completions.create(
+            model=DEPLOYMENT,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=20 * len(images) + 80,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def classify_batch(self, images):
+        if len(images) == 1:
+            return [await self._ask(ARTERY_PROMPT, images)]
+
+        reply = await self._ask(BATCH_PROMPT.format(n=len(images)), images)
+        # Tolerate "1. LAD" / "- RCA" style answers
+        names = [
+            re.sub(r"^\s*(?:\d+[.):]|[-*])\s*", "", line).strip()
+            for line in reply.splitlines()
+            if line.strip()
+        ]
+        if len(names) == len(images):
+            return names
+
+        # Model ignored the format -> one request per image
+        return list(await asyncio.gather(*(
+            self._ask(ARTERY_PROMPT, [img]) for img in images
+        )))
+
+
+class StubArteryClassifier(ArteryClassifier):
+    """Deterministic offline stand-in for load tests and benchmarks."""
+
+    name = "stub"
+
+    async def classify_batch(self, images):
+        if settings.ARTERY_STUB_LATENCY_MS:
+            await asyncio.sleep(settings.ARTERY_STUB_LATENCY_MS / 1000)
+
+        return [
+            ARTERIES[xxhash.xxh64_intdigest(np.ascontiguousarray(img)) % len(ARTERIES)]
+            for img in images
+        ]
+
+
+def deployment_name(backend_name):
+    return DEPLOYMENT if backend_name == "azure" else backend_name
+
+
+def artery_version():
+    """What an artery name depends on besides the ROI itself."""
+    return ARTERY_PROMPT, deployment_name(settings.ARTERY_CLASSIFIER_BACKEND)
+
+
+BACKENDS = {
+    AzureArteryClassifier.name: AzureArteryClassifier,
+    StubArteryClassifier.name: StubArteryClassifier,
+}
+
+
+class ArteryClassificationService:
+    """
+    Cache -> micro-batcher -> bounded backend calls.
+
+    Concurrent `classify` calls within ARTERY_BATCH_WINDOW_MS are sent as
+    one multi-image request; at most ARTERY_MAX_CONCURRENCY requests are
+    in flight at once.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._semaphore = asyncio.Semaphore(settings.ARTERY_MAX_CONCURRENCY)
+        self._pending = []
+        self._flush_handle = None
+        self._inflight = set()  # strong refs so send tasks are not GC'd
+
+    def _deployment(self):
+        return deployment_name(self.backend.name)
+
+    def _lookup(self, img):
+        key = cache_key(img, ARTERY_PROMPT, self._deployment())
+        return key, artery_cache.get(key, img)
+
+    async def classify(self, img):
+        # Hashing + disk tier stay off the event loop
+        key, cached = await asyncio.to_thread(self._lookup, img)
+        cache_lookup("artery", cached is not None)
+        if cached is not None:
+            return cached
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((img, future))
+
+        if len(self._pending) >= settings.ARTERY_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                settings.ARTERY_BATCH_WINDOW_MS / 1000, self._flush
+            )
+
+        artery = await future
+        await asyncio.to_thread(artery_cache.put, key, artery, img)
+        return artery
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch):
+        try:
+            async with self._semaphore:
+                start, outcome = time.perf_counter(), "error"
+                try:
+                    names = await self.backend.classify_batch([img for img, _ in batch])
+                    outcome = "ok"
+                finally:
+                    ARTERY_REQUEST_SECONDS.observe(
+                        time.perf_counter() - start, self.backend.name, outcome
+                    )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), name in zip(batch, names):
+            if not future.done():
+                future.set_result(name)
+
+
+def _load_artery_classifier():
+    return ArteryClassificationService(BACKENDS[settings.ARTERY_CLASSIFIER_BACKEND]())
+
+
+def _warm_artery_classifier(service):
+    # Builds the Azure client (imports openai) ahead of the first request
+    getattr(service.backend, "client", None)
+
+
+registry.register("artery", _load_artery_classifier, _warm_artery_classifier)
+
+
+def get_artery_classifier():
+    return registry.get("artery")
+
+
+async def artery_for_roi(roi, executor=None):
+    """
+    Artery name for a pipeline ROI ({"key": analyse stage key, "render"}).
+
+    The name is memoized under the ROI's analyse key, so a re-run over
+    cached stages never renders the annotated ROI (or decodes the frame);
+    `render` runs on `executor` only on a miss.
+    """
+    service = get_artery_classifier()
+    key = stage_cache.stage_key("artery", roi["key"], ARTERY_PROMPT, service._deployment())
+
+    name = await asyncio.to_thread(stage_cache.get, key)
+    if name is None:
+        image = await asyncio.get_running_loop().run_in_executor(executor, roi["render"])
+        name = await service.classify(image)
+        await asyncio.to_thread(stage_cache.put, key, name)
+    return name
@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import queue
+import threading
+
+import cv2
+
+from core.config import settings
+from core.metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+# Intermediate images nobody reads back; skipped in ARTIFACT_MODE=metrics_only
+DEBUG_KINDS = {"roi", "roi_meta", "mask"}
+
+QUALITY_FLAGS = {
+    "png": cv2.IMWRITE_PNG_COMPRESSION,
+    "jpg": cv2.IMWRITE_JPEG_QUALITY,
+    "webp": cv2.IMWRITE_WEBP_QUALITY,
+}
+
+
+ARTIFACT_WRITE_SECONDS = histogram(
+    "artifact_write_seconds",
+    "Render + encode + write time per artifact, on writer threads",
+    ("kind",),
+)
+ARTIFACT_QUEUE_DEPTH = gauge(
+    "artifact_queue_depth", "Artifacts queued for the background writer"
+)
+ARTIFACT_QUEUE_BYTES = gauge(
+    "artifact_queue_bytes", "Bytes held by artifacts queued for the background writer"
+)
+ARTIFACT_WRITE_FAILURES = counter(
+    "artifact_write_failures_total", "Artifact writes that failed", ("kind",)
+)
+
+
+class ArtifactWriter:
+    """
+    Background writer for pipeline artifacts.
+
+    Pipeline threads hand over an image and get the final path back
+    immediately; encoding and the file write happen on writer threads.
+    The queue is bounded by the bytes it holds, so a slow disk (or
+    network share) throttles the pipeline instead of buffering frames
+    without limit. Queued images must not be mutated until written:
+    they are often views into a frame still in use.
+    """
+
+    def __init__(self, max_bytes, threads):
+        self._queue = queue.Queue()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._room = threading.Condition()
+        self._threads = threads
+        self._workers = []
+        self._dirs = set()
+        self._dirs_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self.failed = 0
+
+    def enabled(self, kind):
+        return not (settings.ARTIFACT_MODE == "metrics_only" and kind in DEBUG_KINDS)
+
+    def path_for(self, kind, stem):
+        return f"{stem}.{settings.ARTIFACT_FORMATS.get(kind, 'png')}"
+
+    def write_image(self, kind, stem, image):
+        """
+        Queue `image` to be encoded as the configured format for `kind`.
+
+        Returns the path the file will have, or None when the kind is
+        skipped in the current ARTIFACT_MODE.
+        """
+        if not self.enabled(kind):
+            return None
+
+        path = self.path_for(kind, stem)
+        fmt = settings.ARTIFACT_FORMATS.get(kind, "png")
+        params = [QUALITY_FLAGS[fmt], settings.ARTIFACT_QUALITY[fmt]]
+
+        def job():
+            self._ensure_dir(path)
+            cv2.imwrite(path, image, params)
+
+        self._submit(kind, job, image.nbytes)
+        return path
+
+    def write_json(self, kind, path, data):
+        if not self.enabled(kind):
+            return None
+
+        # Serialised now: the caller may keep mutating `data`
+        text = json.dumps(data, indent=2)
+
+        def job():
+            self._ensure_dir(path)
+            with open(path, "w") as f:
+                f.write(text)
+
+        self._submit(kind, job, len(text))
+        return path
+
+    def flush(self):
+        """Block until every queued artifact is on disk."""
+        self._queue.join()
+
+    def stop(self):
+        self.flush()
+        with self._start_lock:
+            for _ in self._workers:
+                self._queue.put(None)
+            for worker in self._workers:
+                worker.join()
+            self._workers = []
+
+    def _submit(self, kind, job, nbytes):
+        self._start()
+        with self._room:
+            # Block while full; an artifact larger than the budget still
+            # goes through once the queue has drained
+            while self._bytes and self._bytes + nbytes > self._max_bytes:
+                self._room.wait()
+            self._bytes += nbytes
+        self._queue.put((kind, job, nbytes))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def pending_bytes(self):
+        return self._bytes
+
+    def _start(self):
+        if self._workers:
+            return
+        with self._start_lock:
+            if self._workers:
+                return
+            for i in range(max(1, self._threads)):
+                worker = threading.Thread(
+                    target=self._run, name=f"artifact-writer-{i}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _ensure_dir(self, path):
+        # makedirs once per directory, not once per file
+        directory = os.path.dirname(path)
+        if directory in self._dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._dirs_lock:
+            self._dirs.add(directory)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                kind, job, nbytes = item
+                with ARTIFACT_WRITE_SECONDS.time(kind):
+                    job()
+            except Exception:
+                # A lost debug image must never fail an inference
+                self.failed += 1
+                ARTIFACT_WRITE_FAILURES.inc(kind)
+                logger.exception("artifact write failed")
+            finally:
+                if item is not None:
+                    with self._room:
+                        self._bytes -= nbytes
+                        self._room.notify_all()
+                self._queue.task_done()
+
+
+artifact_writer = ArtifactWriter(
+    settings.ARTIFACT_QUEUE_BYTES, settings.ARTIFACT_WRITER_THREADS
+)
+ARTIFACT_QUEUE_DEPTH.set_function(artifact_writer.pending)
+ARTIFACT_QUEUE_BYTES.set_function(artifact_writer.pending_bytes)
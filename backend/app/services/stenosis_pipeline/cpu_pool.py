@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from core.config import settings
+
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(threads):
+    # Runs once per worker process, before any task.
+    # N workers x M library threads must not exceed the core count.
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+    import cv2
+    cv2.setNumThreads(threads)
+
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=threads)
+
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def pool_size():
+    if settings.CPU_POOL_WORKERS is None:
+        return os.cpu_count() or 1
+    return settings.CPU_POOL_WORKERS
+
+
+def get_pool():
+    global _pool
+
+    if pool_size() <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                mp_context=multiprocessing.get_context(settings.CPU_POOL_START_METHOD),
+                initializer=_init_worker,
+                initargs=(settings.CPU_WORKER_THREADS,),
+            )
+        return _pool
+
+
+def run_cpu(fn, *args):
+    """
+    Run a CPU-bound, picklable stage in the process pool and wait for it.
+
+    Called from pipeline threads; falls back to running inline when the
+    pool is disabled (CPU_POOL_WORKERS=0).
+    """
+    pool = get_pool()
+    if pool is None:
+        return fn(*args)
+    return pool.submit(fn, *args).result()
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,26 @@
+import time
+
+from .mask_service import segment_lumen
+from .stenosis_service import measure_stenosis
+
+
+def analyse_roi(roi, meta):
+    """
+    Segmentation once per ROI, then skeleton/EDT per lesion box.
+
+    Module-level and free of model / network imports so the process
+    pool can pickle it and spawn workers cheaply. No file I/O: the mask
+    is returned and written by the parent's artifact writer.
+
+    Also returns {stage: seconds}: metrics recorded in a pool worker
+    would never reach the parent's /metrics, so the parent records them.
+    """
+    start = time.perf_counter()
+    mask = segment_lumen(roi)
+    segmented = time.perf_counter()
+    measurements = [measure_stenosis(mask, box) for box in meta["yolo_boxes"]]
+    timings = {
+        "frangi": segmented - start,
+        "skeleton": time.perf_counter() - segmented,
+    }
+    return mask, measurements, timings
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+
+# Encapsulated (compressed) pixel data cannot be memory-mapped
+_NATIVE_SYNTAXES = {
+    "1.2.840.10008.1.2",      # Implicit VR Little Endian
+    "1.2.840.10008.1.2.1",    # Explicit VR Little Endian
+    "1.2.840.10008.1.2.2",    # Explicit VR Big Endian (retired)
+}
+_BIG_ENDIAN = "1.2.840.10008.1.2.2"
+
+PIXEL_DATA = 0x7FE00010
+
+
+def is_dicom(path):
+    with open(path, "rb") as f:
+        header = f.read(132)
+    return len(header) == 132 and header[128:132] == b"DICM"
+
+
+class DicomFrameReader:
+    """
+    Lazy frame access for single- and multi-frame (cine) DICOM.
+
+    Uncompressed pixel data is memory-mapped straight from the file, so
+    opening a cine reads only its header and each frame is paged in on
+    access. Compressed transfer syntaxes decode one frame at a time.
+    Frames are returned as BGR uint8, ready for `Frame`.
+    """
+
+    def __init__(self, path):
+        import pydicom
+
+        self.path = path
+        # Defer large elements: pixel data stays on disk, only its offset is read
+        self.ds = pydicom.dcmread(path, defer_size="64 KB")
+
+        self.rows = int(self.ds.Rows)
+        self.cols = int(self.ds.Columns)
+        self.samples = int(getattr(self.ds, "SamplesPerPixel", 1))
+        self.n_frames = int(getattr(self.ds, "NumberOfFrames", 1) or 1)
+        self.bits_stored = int(getattr(self.ds, "BitsStored", self.ds.BitsAllocated))
+        self.invert = getattr(self.ds, "PhotometricInterpretation", "") == "MONOCHROME1"
+
+        syntax = str(self.ds.file_meta.TransferSyntaxUID)
+        self._frames = self._memmap(syntax) if syntax in _NATIVE_SYNTAXES else None
+        self._window = None
+
+    def __len__(self):
+        return self.n_frames
+
+    def _memmap(self, syntax):
+        elem = self.ds.get_item(PIXEL_DATA)
+        offset = getattr(elem, "value_tell", None)
+        if offset is None:
+            return None
+
+        bits = int(self.ds.BitsAllocated)
+        if bits not in (8, 16):
+            return None
+        signed = int(getattr(self.ds, "PixelRepresentation", 0)) == 1
+        dtype = np.dtype(f"{'i' if signed else 'u'}{bits // 8}")
+        if syntax == _BIG_ENDIAN:
+            dtype = dtype.newbyteorder(">")
+
+        shape = (self.n_frames, self.rows, self.cols)
+        if self.samples > 1:
+            shape += (self.samples,)
+
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+    def raw_frame(self, index):
+        if self._frames is not None:
+            return self._frames[index]
+
+        from pydicom.pixels import pixel_array
+        return pixel_array(self.path, index=index)
+
+    def window(self):
+        # One intensity window for the whole run (from a few sampled frames),
+        # so frames stay comparable for key-frame scoring
+        if self._window is None:
+            step = max(1, self.n_frames // 8)
+            sample = np.stack([
+                np.asarray(self.raw_frame(i))[::4, ::4]
+                for i in range(0, self.n_frames, step)
+            ])
+            lo, hi = np.percentile(sample, (0.5, 99.5))
+            self._window = (float(lo), float(max(hi, lo + 1)))
+        return self._window
+
+    def frame_gray(self, index):
+        raw = np.asarray(self.raw_frame(index))
+        if raw.dtype == np.uint8 and self.samples == 1 and not self.invert:
+            return raw
+
+        if self.samples > 1:
+            return cv2.cvtColor(np.ascontiguousarray(raw, dtype=np.uint8), cv2.COLOR_RGB2GRAY)
+
+        lo, hi = self.window()
+        gray = np.clip((raw.astype(np.float32) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+        if self.invert:
+            gray = 255 - gray
+        return gray
+
+    def frame_bgr(self, index):
+        if self.samples > 1:
+            raw = np.ascontiguousarray(self.raw_frame(index), dtype=np.uint8)
+            return cv2.cvtColor(raw, cv2.COLOR_RGB2BGR)
+        return cv2.cvtColor(self.frame_gray(index), cv2.COLOR_GRAY2BGR)
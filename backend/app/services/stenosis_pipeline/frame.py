@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+import xxhash
+
+from .stage_metrics import STAGE_SECONDS
+
+
+class Frame:
+    """
+    An angiogram shared by every pipeline stage.
+
+    The image is decoded at most once, on first access, so stages served
+    from the stage cache do not pay for it. ROIs are numpy views into
+    `image`, so no stage may draw on it in place. `content_hash`
+    identifies the input for stage memoization.
+    """
+
+    def __init__(self, name, image=None, image_bytes=None):
+        self.name = name
+        self._image = image
+        self._bytes = image_bytes
+
+        # Hashing the encoded bytes is far cheaper than decoding them
+        source = image_bytes if image is None else np.ascontiguousarray(image)
+        self.content_hash = xxhash.xxh3_128_hexdigest(source)
+
+    @classmethod
+    def from_bytes(cls, image_bytes, name):
+        return cls(name, image_bytes=image_bytes)
+
+    @property
+    def image(self):
+        if self._image is None:
+            with STAGE_SECONDS.time("decode"):
+                image = cv2.imdecode(
+                    np.frombuffer(self._bytes, np.uint8),
+                    cv2.IMREAD_COLOR
+                )
+            if image is None:
+                raise ValueError(f"Could not decode image {self.name}")
+            self._image = image
+            self._bytes = None
+        return self._image
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def crop(self, x1, y1, x2, y2):
+        # Basic slicing -> zero-copy view
+        return self.image[y1:y2, x1:x2]
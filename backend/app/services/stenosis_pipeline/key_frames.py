@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+
+_SCORE_SIDE = 256
+_TOPHAT_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (15, 15))
+
+
+def opacification_score(gray):
+    """
+    How well-filled with contrast a frame looks.
+
+    Vessels are dark, thin structures: a black top-hat at low resolution
+    isolates them, and the mean of its strongest responses rises as the
+    arteries fill. Multiplied by global contrast so washed-out frames lose.
+    """
+    h, w = gray.shape[:2]
+    scale = _SCORE_SIDE / max(h, w)
+    if scale < 1:
+        gray = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+    tophat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, _TOPHAT_KERNEL)
+    top = max(1, tophat.size // 20)
+    strongest = np.partition(tophat.ravel(), -top)[-top:]
+    return float(strongest.mean()) * float(gray.std())
+
+
+def select_key_frames(reader, count, stride=1, min_gap=1):
+    """
+    Indices of the `count` best-opacified frames, in temporal order.
+
+    Frames are scored every `stride` frames and picked greedily by score,
+    keeping at least `min_gap` frames between picks so the run is covered
+    by distinct phases rather than neighbouring near-duplicates.
+    """
+    n = len(reader)
+    if n <= count:
+        return list(range(n))
+
+    scored = sorted(
+        ((opacification_score(reader.frame_gray(i)), i) for i in range(0, n, stride)),
+        reverse=True,
+    )
+
+    picked = []
+    for _, i in scored:
+        if all(abs(i - j) >= min_gap for j in picked):
+            picked.append(i)
+            if len(picked) == count:
+                break
+
+    return sorted(picked)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from core.metrics import histogram
+
+# Cold loads (weights, imports, warmup) run from seconds to minutes
+MODEL_LOAD_SECONDS = histogram(
+    "model_load_seconds",
+    "Time to load and warm up a model, once per process",
+    ("model",),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+
+
+class ModelRegistry:
+    """
+    Named models loaded on first use or by an explicit warmup.
+
+    Importing a service only registers a loader; the heavy imports
+    (torch, ultralytics, openai) and weight loading happen in `get`, once
+    per process, so API workers that never run inference never pay for
+    them. Loads are serialised per model; other models stay available.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._status = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, warmup=None):
+        """`loader()` returns the model; `warmup(model)` primes it (optional)."""
+        with self._lock:
+            self._loaders[name] = (loader, warmup)
+            self._locks.setdefault(name, threading.Lock())
+            self._status.setdefault(name, {"state": "not_loaded"})
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if name not in self._models:
+                self._load(name)
+        return self._models[name]
+
+    def _load(self, name):
+        loader, warmup = self._loaders[name]
+        self._status[name] = {"state": "loading"}
+        start = time.perf_counter()
+        try:
+            model = loader()
+            if warmup is not None:
+                warmup(model)
+        except Exception as e:
+            self._status[name] = {"state": "failed", "error": repr(e)}
+            raise
+        seconds = time.perf_counter() - start
+        MODEL_LOAD_SECONDS.observe(seconds, name)
+        self._models[name] = model
+        self._status[name] = {
+            "state": "ready",
+            "load_seconds": round(seconds, 3),
+        }
+
+    def warmup(self, names=None):
+        """Load `names` (default: every registered model). Blocking."""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def ready(self, names):
+        return all(self._status.get(n, {}).get("state") == "ready" for n in names)
+
+    def status(self):
+        return {name: dict(s) for name, s in self._status.items()}
+
+
+registry = ModelRegistry()
@@ -1,53 +1,216 @@
+import functools
 import os
-import cv2
-import uuid
-import numpy as np
-from .yolo_service import detect_stenosis
-from .roi_service import extract_roi
-from .mask_service import segment_lumen
-from .stenosis_service import compute_stenosis
+import time
+from pathlib import Path
+from core.config import settings
+from . import stage_cache
+from .frame import Frame
+from .dicom_reader import DicomFrameReader, is_dicom
+from .key_frames import select_key_frames
+from .yolo_service import detect_stenosis, model_version, CONF_THRESHOLD, DETECT_VERSION
+from .roi_service import extract_roi, group_detections, ROI_SCALE
+from .mask_service import SEGMENT_PARAMS
+from .cpu_pool import run_cpu
+from .cpu_stages import analyse_roi
+from .stenosis_service import draw_stenosis, classify_severity, MEASURE_VERSION
+from .artifact_writer import artifact_writer
+from .artery_vision_service import artery_version
+from .stage_metrics import STAGE_SECONDS, observe_stages
 
-RESULTS_DIR = "storage/results/visuals"
-os.makedirs("storage/results/yolo_detections", exist_ok=True)
+ROI_DIR = "storage/roi"
+MASK_DIR = "storage/masks"
+
+
+def pipeline_version():
+    """
+    Fingerprint of everything that shapes an image's findings: weights,
+    detection / ROI / segmentation / measurement parameters, cine frame
+    selection and the artery classifier. Stored with each finding, so
+    findings are only reused across studies under the same fingerprint.
+    Reads the weights on first use: call off the event loop.
+    """
+    return stage_cache.stage_key(
+        "pipeline", model_version(), CONF_THRESHOLD, DETECT_VERSION,
+        ROI_SCALE, SEGMENT_PARAMS, MEASURE_VERSION,
+        settings.CINE_KEY_FRAMES, settings.CINE_SCORE_STRIDE, settings.CINE_MIN_FRAME_GAP,
+        artery_version(),
+    )
+
+
+def run_file_pipeline(file_path: str):
+    image_name = os.path.basename(file_path)
+
+    if is_dicom(file_path):
+        return run_dicom_pipeline(file_path, image_name)
+
+    with open(file_path, "rb") as f:
+        image_bytes = f.read()
+    return run_stenosis_pipeline(image_bytes, image_name)
 
 
 def run_stenosis_pipeline(image_bytes: bytes, image_name: str):
-    yolo_out = detect_stenosis(image_bytes)
-    # Decode original image
-    full_img = cv2.imdecode(
-        np.frombuffer(image_bytes, np.uint8),
-        cv2.IMREAD_COLOR
+    # Decode once; every stage below works on this frame
+    frame = Frame.from_bytes(image_bytes, image_name)
+    return run_frame_pipeline(frame)
+
+
+def run_dicom_pipeline(file_path: str, image_name: str):
+    """
+    Run the pipeline on the key frames of a (cine) DICOM.
+
+    Frames are memory-mapped and scored cheaply; only the best-opacified
+    CINE_KEY_FRAMES go through detection/segmentation. The frame with the
+    most severe reliable lesion is reported for the image.
+    """
+    reader = DicomFrameReader(file_path)
+    indices = select_key_frames(
+        reader,
+        settings.CINE_KEY_FRAMES,
+        stride=settings.CINE_SCORE_STRIDE,
+        min_gap=settings.CINE_MIN_FRAME_GAP,
     )
 
-    yolo_vis_name = None
+    stem = Path(image_name).stem
+    best = None
+    for index in indices:
+        with STAGE_SECONDS.time("decode"):
+            image = reader.frame_bgr(index)
+        frame = Frame(f"{stem}_f{index:04d}.png", image=image)
+        result = run_frame_pipeline(frame)
+        if result is None:
+            continue
+
+        result["frame_index"] = index
+        for lesion in result["lesions"]:
+            lesion["geometry"]["frame_index"] = index
+        if best is None or _severity_rank(result) > _severity_rank(best):
+            best = result
+
+    return best
+
+
+def _severity_rank(result):
+    percent = result["stenosis_percent"]
+    return -1 if percent is None else percent
+
+
+def _roi_stem(name, index, count):
+    stem = Path(name).stem
+    return stem if count == 1 else f"{stem}_roi{index}"
+
 
-    if yolo_out["detected"]:
-        x1, y1, x2, y2 = map(int, yolo_out["box"])
-        cv2.rectangle(full_img, (x1, y1), (x2, y2), (0, 0, 255), 3)
+def _lesion_geometry(box, rect, measurement):
+    """Everything an overlay needs, in frame pixel coordinates."""
+    x0, y0 = rect[:2]
 
-        yolo_vis_name = f"{uuid.uuid4()}_yolo.png"
-        yolo_vis_path = f"storage/results/yolo_detections/{yolo_vis_name}"
-        cv2.imwrite(yolo_vis_path, full_img)
+    def shift(point):
+        return None if point is None else [point[0] + x0, point[1] + y0]
 
+    return {
+        "box": [int(v) for v in box],
+        "roi": list(rect),
+        "min_point": shift(measurement.get("min_point")),
+        "ref_point": shift(measurement.get("ref_point")),
+        "percent": measurement["percent"],
+        "frame_index": None,
+    }
+
+
+def _analyse(roi, meta):
+    start = time.perf_counter()
+    mask, measurements, timings = run_cpu(analyse_roi, roi, meta)
+    observe_stages(timings)
+    # Pickling + waiting for a free pool worker
+    STAGE_SECONDS.observe(time.perf_counter() - start - sum(timings.values()), "cpu_pool_wait")
+    return mask, measurements
+
+
+def _annotated_roi(frame, rect, boxes, measurements):
+    """Annotated ROI for the artery classifier (decodes the frame if needed)."""
+    roi, meta = extract_roi(frame, rect, boxes)
+    with STAGE_SECONDS.time("render"):
+        return draw_stenosis(roi, meta, measurements)
+
+
+def _measure_roi(frame, stem, rect, boxes, analyse_key):
+    """(mask, measurements) for one ROI; crops and segments only on a miss."""
+    cached = stage_cache.get(analyse_key)
+    if cached is not None:
+        return cached
+
+    roi, meta = extract_roi(frame, rect, boxes)
+
+    # Debug artifacts are encoded and written in the background; the ROIs
+    # and frame.image are never drawn on, so the writer can read them later
+    artifact_writer.write_image("roi", f"{ROI_DIR}/{stem}", roi)
+    artifact_writer.write_json("roi_meta", f"{ROI_DIR}/{stem}.json", meta)
+
+    # Frangi + skeleton/EDT run in the process pool
+    mask, measurements = _analyse(roi, meta)
+    stage_cache.put(analyse_key, (mask, measurements))
+    artifact_writer.write_image("mask", f"{MASK_DIR}/{stem}", mask)
+    return mask, measurements
+
+
+def run_frame_pipeline(frame: Frame):
+    # Stage keys chain on the upstream key, so the run resumes from
+    # the first stage whose inputs or parameters changed. When every
+    # stage hits, the frame is never decoded: only severity is re-derived
+    yolo_key = stage_cache.stage_key(
+        "yolo", frame.content_hash, model_version(), CONF_THRESHOLD, DETECT_VERSION
+    )
+    yolo_out = stage_cache.memoize(yolo_key, lambda: detect_stenosis(frame))
 
     if not yolo_out["detected"]:
         return None
 
-    roi, meta = extract_roi(image_bytes, yolo_out, image_name)
-    mask = segment_lumen(roi, image_name)
-    result = compute_stenosis(roi, mask, meta)
+    detections = yolo_out["detections"]
+
+    # Lesions with overlapping ROIs share one segmentation of their union;
+    # the frame shape comes with the cached detections
+    with STAGE_SECONDS.time("roi"):
+        groups = group_detections(detections, yolo_out["shape"], ROI_SCALE)
+
+    lesions = [None] * len(detections)
+    annotated_rois = []
+    for roi_index, (rect, members) in enumerate(groups):
+        stem = _roi_stem(frame.name, roi_index, len(groups))
+        boxes = [detections[i]["box"] for i in members]
+        analyse_key = stage_cache.stage_key(
+            "analyse", yolo_key, ROI_SCALE, roi_index, SEGMENT_PARAMS, MEASURE_VERSION
+        )
+        mask, measurements = _measure_roi(frame, stem, rect, boxes, analyse_key)
+
+        # The annotated ROI is only for the artery classifier and is drawn
+        # only if its answer is not cached; overlays are rendered on demand
+        # from the stored geometry
+        reliable = any(m["percent"] is not None for m in measurements)
+        annotated_rois.append({
+            "key": analyse_key,
+            "render": functools.partial(_annotated_roi, frame, rect, boxes, measurements),
+        } if reliable else None)
 
-    os.makedirs(RESULTS_DIR, exist_ok=True)
+        for i, measurement in zip(members, measurements):
+            lesions[i] = {
+                "lesion_index": i,
+                "roi_index": roi_index,
+                "artery": None,
+                "box": detections[i]["box"],
+                "confidence": detections[i]["confidence"],
+                "stenosis_percent": measurement["percent"],
+                "severity": classify_severity(measurement["percent"]),
+                "diameter_profile": measurement["profile"],
+                "geometry": _lesion_geometry(detections[i]["box"], rect, measurement),
+            }
 
-    visual_name = f"{uuid.uuid4()}_visual.png"
-    visual_path = os.path.join(RESULTS_DIR, visual_name)
-    cv2.imwrite(visual_path, result["visual"])
+    worst = max(lesions, key=_severity_rank)
 
+    # Artery names are classified asynchronously by the caller, once per
+    # annotated ROI (see artery_vision_service.artery_for_roi)
     return {
-        "artery": result["artery"],
-        "stenosis_percent": result["percent"],
-        "severity": result["severity"],
-        "confidence": yolo_out["confidence"],
-        "visual_path": visual_path,
-        "yolo_visual_path": yolo_vis_path
+        "lesions": lesions,
+        "annotated_rois": annotated_rois,
+        "stenosis_percent": worst["stenosis_percent"],
+        "severity": worst["severity"],
+        "confidence": worst["confidence"],
     }
@@ -1,41 +1,77 @@
-import os
-import cv2
-import numpy as np
-import json
+ROI_SCALE = 2
 
-def extract_roi(image_bytes, yolo_out, filename, scale=2):
-    os.makedirs("storage/roi", exist_ok=True)
 
-    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
-    H, W = img.shape[:2]
+def _expanded(box, shape, scale):
+    H, W = shape[:2]
 
-    x1, y1, x2, y2 = map(int, yolo_out["box"])
+    x1, y1, x2, y2 = map(int, box)
     cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
 
     bw, bh = int((x2 - x1) * scale), int((y2 - y1) * scale)
 
-    x1p = max(0, cx - bw)
-    y1p = max(0, cy - bh)
-    x2p = min(W, cx + bw)
-    y2p = min(H, cy + bh)
+    return (
+        max(0, cx - bw),
+        max(0, cy - bh),
+        min(W, cx + bw),
+        min(H, cy + bh),
+    )
 
-    roi = img[y1p:y2p, x1p:x2p]
 
-    # YOLO box relative to ROI
-    yolo_box_roi = [
-        x1 - x1p,
-        y1 - y1p,
-        x2 - x1p,
-        y2 - y1p
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def group_detections(detections, shape, scale=ROI_SCALE):
+    """
+    Cluster detections whose expanded ROIs overlap.
+
+    Returns [(roi rect, [lesion indices])], one entry per segmentation
+    run: overlapping lesions share the union of their ROIs instead of
+    segmenting the same vessels twice. Lesion indices follow the order
+    of `detections` (most confident first).
+    """
+    groups = [
+        (_expanded(d["box"], shape, scale), [i])
+        for i, d in enumerate(detections)
     ]
 
-    roi_path = os.path.join("storage", "roi", filename)
-    cv2.imwrite(roi_path, roi)
+    # Merge until stable; a union can grow into a third ROI
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                (a, la), (b, lb) = groups[i], groups[j]
+                if _overlaps(a, b):
+                    rect = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    groups[i] = (rect, sorted(la + lb))
+                    del groups[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    return sorted(groups, key=lambda g: g[1][0])
 
-    meta = {"yolo_box": yolo_box_roi}
 
-    meta_path = os.path.join("storage", "roi", filename + ".json")
-    with open(meta_path, "w") as f:
-        json.dump(meta, f, indent=2)
+def extract_roi(frame, rect, boxes):
+    x1p, y1p, x2p, y2p = rect
+
+    # View into the shared frame, not a copy
+    roi = frame.crop(x1p, y1p, x2p, y2p)
+
+    # YOLO boxes relative to ROI
+    yolo_boxes_roi = [
+        [
+            int(x1) - x1p,
+            int(y1) - y1p,
+            int(x2) - x1p,
+            int(y2) - y1p
+        ]
+        for x1, y1, x2, y2 in boxes
+    ]
+
+    meta = {"yolo_boxes": yolo_boxes_roi}
 
+    # Written (if at all) by the pipeline through artifact_writer
     return roi, meta
@@ -0,0 +1,145 @@
+import logging
+import os
+import pickle
+import tempfile
+import threading
+
+import xxhash
+import zstandard
+
+from core.config import settings
+from core.metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Eviction walks the whole directory, so only do it every N writes
+_EVICT_EVERY = 256
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+def stage_key(stage, *parts):
+    """
+    Content-addressed key for one stage's output.
+
+    `parts` are the upstream key / content hash and every parameter
+    that affects the stage, so keys chain: a change upstream produces
+    new keys for every stage below it.
+    """
+    h = xxhash.xxh3_128()
+    h.update(stage.encode("utf-8"))
+    for part in parts:
+        h.update(b"\0")
+        h.update(repr(part).encode("utf-8"))
+    return f"{stage}-{h.hexdigest()}"
+
+
+def _codecs():
+    # zstd contexts are not thread-safe -> one pair per pipeline thread
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=settings.STAGE_CACHE_LEVEL)
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.compressor, _local.decompressor
+
+
+def _path(key):
+    stage, digest = key.split("-", 1)
+    return os.path.join(settings.STAGE_CACHE_DIR, stage, digest[:2], f"{digest}.pkl.zst")
+
+
+def get(key):
+    if not settings.STAGE_CACHE_ENABLED:
+        return None
+
+    stage = key.split("-", 1)[0]
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+        os.utime(path)  # LRU order for evict()
+    except FileNotFoundError:
+        cache_lookup(f"stage_{stage}", False)
+        return None
+
+    _, decompressor = _codecs()
+    try:
+        value = pickle.loads(decompressor.decompress(blob))
+    except Exception:
+        # Truncated or corrupt entry: recompute (and overwrite) it
+        logger.warning("dropping unreadable stage cache entry %s", path)
+        _remove(path)
+        cache_lookup(f"stage_{stage}", False)
+        return None
+
+    cache_lookup(f"stage_{stage}", True)
+    return value
+
+
+def put(key, value):
+    if not settings.STAGE_CACHE_ENABLED:
+        return
+
+    compressor, _ = _codecs()
+    blob = compressor.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    path = _path(key)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Unique per writer (threads, API workers and pool processes share the dir)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        _remove(tmp)
+        raise
+
+    global _writes
+    with _writes_lock:
+        _writes += 1
+        due = _writes % _EVICT_EVERY == 0
+    if due:
+        evict()
+
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits STAGE_CACHE_MAX_BYTES."""
+    max_bytes = settings.STAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    entries, total = [], 0
+    for root, _, files in os.walk(settings.STAGE_CACHE_DIR):
+        for name in files:
+            if name.endswith(".pkl.zst"):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def memoize(key, compute):
+    """Return the cached output for `key`, computing and storing it on a miss."""
+    value = get(key)
+    if value is None:
+        value = compute()
+        put(key, value)
+    return value
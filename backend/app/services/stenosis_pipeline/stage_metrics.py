@@ -0,0 +1,16 @@
+from core.metrics import histogram
+
+# Default buckets (1 ms .. 60 s). Model loads are not stage time: they
+# are timed in model_load_seconds, and "yolo" starts inside the predict
+# lock, so waiting for another thread's prediction is not counted either.
+STAGE_SECONDS = histogram(
+    "pipeline_stage_seconds",
+    "Time per pipeline stage (per frame, per ROI for frangi / skeleton)",
+    ("stage",),
+)
+
+
+def observe_stages(timings):
+    """Record {stage: seconds} measured elsewhere (e.g. in a pool worker)."""
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage)
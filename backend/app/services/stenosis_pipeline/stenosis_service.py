@@ -2,74 +2,269 @@ import numpy as np
 import cv2
 from skimage.morphology import skeletonize
 from scipy.ndimage import distance_transform_edt
-from .artery_vision_service import detect_artery_name
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 
-def compute_stenosis(roi, mask, meta):
-    binary = mask > 0
-    skeleton = skeletonize(binary)
-    dist = distance_transform_edt(binary)
+# Bump when measure_stenosis output changes (invalidates cached geometry)
+MEASURE_VERSION = 4
 
-    coords = np.column_stack(np.where(skeleton))
-    diameters = dist[skeleton] * 2
+# Max samples kept in the stored diameter-along-centerline profile
+PROFILE_POINTS = 64
 
-    sx1, sy1, sx2, sy2 = meta["yolo_box"]
+# (upper bound %, label); severity is applied after the cached geometry,
+# so tweaking these never re-runs segmentation
+SEVERITY_THRESHOLDS = [
+    (30, "Normal"),
+    (50, "Mild"),
+    (70, "Moderate"),
+]
 
-    inside = (
-        (coords[:,1] >= sx1) & (coords[:,1] <= sx2) &
-        (coords[:,0] >= sy1) & (coords[:,0] <= sy2)
+
+def classify_severity(percent):
+    if percent is None:
+        return "Unreliable"
+    for upper, label in SEVERITY_THRESHOLDS:
+        if percent < upper:
+            return label
+    return "Severe"
+
+
+def lesion_component(binary, box):
+    """
+    Mask of the single vessel segment crossing the lesion box.
+
+    The 8-connected component with the most pixels inside the box wins;
+    everything else in the ROI (side branches that never touch the box,
+    neighbouring vessels) is dropped before skeleton/EDT.
+    Returns (component, (y0, x0) offset of the crop) or (None, None).
+    """
+    sx1, sy1, sx2, sy2 = box
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(
+        binary.astype(np.uint8), connectivity=8
     )
-    outside = ~inside
 
-    if inside.sum() < 3 or outside.sum() < 7:
-        return {
-            "percent": None,
-            "severity": "Unreliable",
-            "artery": "Unknown",
-            "visual": roi
-        }
-
-    D_min = diameters[inside].min()
-    D_ref = np.sort(diameters[outside])[-10:].mean()
-    percent = (1 - D_min / D_ref) * 100
-
-    if percent < 30:
-        severity = "Normal"
-    elif percent < 50:
-        severity = "Mild"
-    elif percent < 70:
-        severity = "Moderate"
-    else:
-        severity = "Severe"
+    in_box = labels[sy1:sy2 + 1, sx1:sx2 + 1]
+    counts = np.bincount(in_box.ravel(), minlength=len(stats))
+    counts[0] = 0  # background
+    if counts.max() == 0:
+        return None, None
+    label = int(counts.argmax())
 
-    # ---------- Visualization ----------
-    vis = roi.copy()
+    # Crop to the component (+1px of background so the EDT is unchanged)
+    x, y, w, h = stats[label, :4]
+    y0, x0 = max(0, y - 1), max(0, x - 1)
+    crop = labels[y0:y + h + 1, x0:x + w + 1] == label
+    return crop, (y0, x0)
 
-    cv2.rectangle(vis, (sx1, sy1), (sx2, sy2), (255, 0, 0), 2)
 
-    idx_min = np.where(inside)[0][np.argmin(diameters[inside])]
-    y_min, x_min = coords[idx_min]
-    cv2.circle(vis, (x_min, y_min), 4, (0, 0, 255), -1)
+def _skeleton_graph(skeleton):
+    """8-connected skeleton pixels as a sparse graph (edge weight = step length)."""
+    coords = np.column_stack(np.nonzero(skeleton))
+    index = np.full(skeleton.shape, -1, dtype=np.int64)
+    index[coords[:, 0], coords[:, 1]] = np.arange(len(coords))
 
-    idx_ref = np.where(outside)[0][np.argmax(diameters[outside])]
-    y_ref, x_ref = coords[idx_ref]
-    cv2.circle(vis, (x_ref, y_ref), 4, (0, 255, 0), -1)
+    h, w = skeleton.shape
+    rows, cols, weights = [], [], []
+    for dy, dx in ((0, 1), (1, -1), (1, 0), (1, 1)):
+        ys, xs = coords[:, 0] + dy, coords[:, 1] + dx
+        ok = (ys < h) & (xs >= 0) & (xs < w)
+        src = np.nonzero(ok)[0]
+        dst = index[ys[ok], xs[ok]]
+        linked = dst >= 0
+        rows.append(src[linked])
+        cols.append(dst[linked])
+        weights.append(np.full(linked.sum(), np.hypot(dy, dx)))
 
-    cv2.putText(
-        vis,
-        f"{percent:.1f}%",
-        (10, 30),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.9,
-        (0, 255, 255),
-        2
+    graph = csr_matrix(
+        (np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(len(coords), len(coords)),
     )
+    return coords, graph
+
+
+def centerline_path(skeleton, seed_point):
+    """
+    Ordered centerline through the lesion, as (coords, arc length) arrays.
+
+    Geodesic distances from the skeleton pixel nearest `seed_point` give
+    the farthest end on one side. The other side is searched again with
+    that walk cut out of the graph, so a second neighbour of the seed
+    lying on the same side cannot lead the path back over itself.
+    Joining the two walks yields the longest path that still passes
+    through the lesion, so side branches are skipped.
+    """
+    coords, graph = _skeleton_graph(skeleton)
+    seed = int(np.argmin(((coords - seed_point) ** 2).sum(axis=1)))
+
+    def farthest(graph):
+        dist, pred = dijkstra(graph, directed=False, indices=seed, return_predecessors=True)
+        dist[~np.isfinite(dist)] = -1
+        end = int(dist.argmax())
+        nodes = [end]
+        while nodes[-1] != seed:
+            nodes.append(pred[nodes[-1]])
+        return nodes[::-1], dist[end]  # seed -> end
+
+    path, _ = farthest(graph)
+
+    edges = graph.tocoo()
+    keep = np.ones(len(coords), dtype=bool)
+    keep[path[1:]] = False
+    kept = keep[edges.row] & keep[edges.col]
+    rest = csr_matrix((edges.data[kept], (edges.row[kept], edges.col[kept])), shape=graph.shape)
+
+    # More than a stray pixel beside the seed -> the path has a second side
+    other, length = farthest(rest)
+    if length > 2:
+        path = other[::-1] + path[1:]
+
+    ordered = coords[path]
+    steps = np.hypot(*np.diff(ordered, axis=0).T)
+    return ordered, np.concatenate([[0.0], np.cumsum(steps)])
+
+
+def diameter_profile(arc, diameters, inside, points=PROFILE_POINTS):
+    """Diameters resampled to <= `points` uniform arc-length steps."""
+    n = min(points, len(arc))
+    at = np.linspace(0, arc[-1], n)
+    resampled = np.interp(at, arc, diameters)
+    lesion = np.nonzero(inside)[0]
+    return {
+        "length_px": round(float(arc[-1]), 1),
+        "diameter_px": [round(float(d), 2) for d in resampled],
+        "lesion_range": [
+            int(np.searchsorted(at, arc[lesion[0]])),
+            int(np.searchsorted(at, arc[lesion[-1]])),
+        ],
+    }
+
+
+def measure_stenosis(mask, box):
+    """
+    Pure-CPU geometry along the lesion centerline.
+
+    `box` is one lesion's YOLO box in mask coordinates; a mask shared by
+    several lesions is measured once per box. Only the vessel segment
+    crossing the box is skeletonised; its
+    skeleton is ordered into a path through the lesion and diameters
+    (2 x EDT) are read along it. D_min comes from the path inside the
+    box. D_ref is QCA-style interpolated: a straight line fitted to the
+    diameters just outside the box, one lesion length either side,
+    evaluated at D_min, so vessel taper and wide segments elsewhere in
+    the ROI do not inflate it.
+
+    Kept free of drawing and network calls so it can run in the
+    process pool (see cpu_pool.py).
+    """
+    unreliable = {"percent": None, "profile": None}
+
+    component, offset = lesion_component(mask > 0, box)
+    if component is None:
+        return unreliable
+
+    skeleton = skeletonize(component)
+    if skeleton.sum() < 10:
+        return unreliable
 
-    # ---------- Azure OpenAI Vision ----------
-    artery = detect_artery_name(vis)
+    dist = distance_transform_edt(component)
+
+    sx1, sy1, sx2, sy2 = box
+    y0, x0 = offset
+    center = np.array([(sy1 + sy2) / 2 - y0, (sx1 + sx2) / 2 - x0])
+    path, arc = centerline_path(skeleton, center)
+    diameters = dist[path[:, 0], path[:, 1]] * 2
+
+    ys, xs = path[:, 0] + y0, path[:, 1] + x0
+    inside = (xs >= sx1) & (xs <= sx2) & (ys >= sy1) & (ys <= sy2)
+    outside = ~inside
+
+    if inside.sum() < 3 or outside.sum() < 7:
+        return unreliable
+
+    inside_idx = np.nonzero(inside)[0]
+    i_min = inside_idx[np.argmin(diameters[inside_idx])]
+
+    start, end = arc[inside_idx[0]], arc[inside_idx[-1]]
+    reach = max(end - start, 10.0)
+    reference = np.nonzero(outside & (arc >= start - reach) & (arc <= end + reach))[0]
+    if len(reference) < 3:
+        return unreliable
+
+    slope, intercept = np.polyfit(arc[reference], diameters[reference], 1)
+    D_ref = max(slope * arc[i_min] + intercept, diameters[i_min])
+    i_ref = reference[np.argmax(diameters[reference])]
+
+    percent = (1 - diameters[i_min] / D_ref) * 100
 
     return {
         "percent": round(float(percent), 2),
-        "severity": severity,
-        "artery": artery,
-        "visual": vis
+        "min_point": (int(xs[i_min]), int(ys[i_min])),
+        "ref_point": (int(xs[i_ref]), int(ys[i_ref])),
+        "profile": diameter_profile(arc, diameters, inside),
     }
+
+
+def draw_stenosis(roi, meta, measurements):
+    # ---------- Visualization ----------
+    # One image per ROI, every lesion in it annotated
+    if all(m["percent"] is None for m in measurements):
+        return roi
+
+    vis = roi.copy()
+
+    for box, measurement in zip(meta["yolo_boxes"], measurements):
+        sx1, sy1, sx2, sy2 = box
+        cv2.rectangle(vis, (sx1, sy1), (sx2, sy2), (255, 0, 0), 2)
+
+        if measurement["percent"] is None:
+            continue
+
+        cv2.circle(vis, measurement["min_point"], 4, (0, 0, 255), -1)
+        cv2.circle(vis, measurement["ref_point"], 4, (0, 255, 0), -1)
+
+        cv2.putText(
+            vis,
+            f"{measurement['percent']:.1f}%",
+            (sx1, max(20, sy1 - 8)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.9,
+            (0, 255, 255),
+            2
+        )
+    return vis
+
+
+def draw_overlay(image, lesions, origin=(0, 0)):
+    """
+    Render lesion geometry (frame coordinates) onto a copy of `image`.
+
+    `origin` is the frame position of image[0, 0], so the same geometry
+    draws on the full frame or on a crop of it.
+    """
+    vis = image.copy()
+    ox, oy = origin
+
+    def at(point):
+        return (int(point[0]) - ox, int(point[1]) - oy)
+
+    for lesion in lesions:
+        x1, y1, x2, y2 = lesion["box"]
+        cv2.rectangle(vis, at((x1, y1)), at((x2, y2)), (0, 0, 255), 2)
+
+        if lesion["percent"] is None:
+            continue
+
+        cv2.circle(vis, at(lesion["min_point"]), 4, (0, 0, 255), -1)
+        cv2.circle(vis, at(lesion["ref_point"]), 4, (0, 255, 0), -1)
+
+        lx, ly = at((x1, y1))
+        cv2.putText(
+            vis,
+            f"{lesion['percent']:.1f}%",
+            (lx, max(20, ly - 8)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.9,
+            (0, 255, 255),
+            2
+        )
+    return vis
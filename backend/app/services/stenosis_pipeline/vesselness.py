@@ -0,0 +1,109 @@
+import functools
+
+import cv2
+import numpy as np
+
+# skimage's 'reflect' (dcba|abcd) == OpenCV BORDER_REFLECT
+_BORDER = cv2.BORDER_REFLECT
+
+
+@functools.cache
+def _hessian_kernels(d):
+    """
+    1-D (smooth, first, second derivative) kernels at scale `d`.
+
+    Built the way skimage builds its Gaussian-derivative Hessian: two
+    passes of sampled Gaussian / first-derivative-of-Gaussian kernels at
+    d / sqrt(2), here composed into one kernel per axis and pass.
+    """
+    s = d / np.sqrt(2)
+    radius = int(np.ceil(4 * max(s, 1.0)))
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    g = np.exp(-x ** 2 / (2 * s ** 2))
+    g /= g.sum()
+    g1 = -x / s ** 2 * g
+    return tuple(
+        np.convolve(a, b).astype(np.float32) for a, b in ((g, g), (g1, g), (g1, g1))
+    )
+
+
+def frangi_vesselness(gray, sigmas=(1, 3, 5, 7, 9), beta=0.5, gamma=None):
+    """
+    Frangi vesselness for dark ridges, float32 throughout.
+
+    Approximates `skimage.filters.frangi(gray)` with default arguments
+    (black ridges, no sigma^2 normalisation, gamma fixed from the first
+    scale); it is not bit-identical, see benchmarks/vesselness.py for the
+    mask agreement. Computed differently:
+
+    - every scale is first blurred to sqrt(sigma^2 - d^2), d = smallest
+      sigma, incrementally from the previous scale, so large scales cost
+      as little as small ones;
+    - the Hessian then comes from fixed Gaussian-derivative kernels at
+      scale d (Gaussians compose, so the total scale is sigma); at the
+      smallest scale this is skimage's computation, above it the two
+      differ by kernel sampling and truncation only;
+    - eigenvalues are closed-form and the running max is updated in place.
+    """
+    sigmas = sorted(sigmas)
+    d = float(sigmas[0])
+    smooth, first, second = _hessian_kernels(d)
+
+    image = gray.astype(np.float32)
+    blurred = image
+    blurred_to = 0.0
+
+    out = np.zeros_like(image)
+    hxx = np.empty_like(image)
+    hyy = np.empty_like(image)
+    hxy = np.empty_like(image)
+
+    for sigma in sigmas:
+        target = float(np.sqrt(sigma ** 2 - d ** 2))
+        step = float(np.sqrt(target ** 2 - blurred_to ** 2))
+        if step > 0:
+            blurred = cv2.GaussianBlur(blurred, (0, 0), step, borderType=_BORDER)
+        blurred_to = target
+
+        cv2.sepFilter2D(blurred, cv2.CV_32F, second, smooth, dst=hxx, borderType=_BORDER)
+        cv2.sepFilter2D(blurred, cv2.CV_32F, smooth, second, dst=hyy, borderType=_BORDER)
+        cv2.sepFilter2D(blurred, cv2.CV_32F, first, first, dst=hxy, borderType=_BORDER)
+
+        # Eigenvalues of [[hxx, hxy], [hxy, hyy]]
+        trace = hxx + hyy
+        root = np.sqrt((hxx - hyy) ** 2 + 4 * hxy ** 2)
+        mu1 = (trace + root) * 0.5
+        mu2 = (trace - root) * 0.5
+
+        # lambda1 = smaller magnitude, lambda2 = larger magnitude
+        swap = np.abs(mu1) > np.abs(mu2)
+        lambda1 = np.where(swap, mu2, mu1)
+        lambda2 = np.where(swap, mu1, mu2)
+
+        s2 = lambda1 ** 2 + lambda2 ** 2
+        if gamma is None:
+            gamma = float(np.sqrt(s2.max())) / 2 or 1.0
+
+        # Bright-on-dark structures have lambda2 < 0 -> r_b huge -> response 0
+        rb2 = (lambda1 / np.maximum(lambda2, 1e-10)) ** 2
+
+        vals = np.exp(rb2 * np.float32(-1 / (2 * beta ** 2)))
+        vals *= 1 - np.exp(s2 * np.float32(-1 / (2 * gamma ** 2)))
+        np.maximum(out, vals, out=out)
+
+    return out
+
+
+def remove_small_components(binary, min_size, connectivity=4):
+    """
+    Drop connected components smaller than `min_size` pixels.
+
+    OpenCV equivalent of skimage's remove_small_objects (4-connectivity
+    matches its default for 2-D), returning a uint8 0/255 mask.
+    """
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(
+        binary.astype(np.uint8), connectivity=connectivity
+    )
+    keep = stats[:, cv2.CC_STAT_AREA] >= min_size
+    keep[0] = False  # background
+    return np.where(keep[labels], 255, 0).astype(np.uint8)
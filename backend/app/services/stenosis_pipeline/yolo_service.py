@@ -1,37 +1,138 @@
-from ultralytics import YOLO
-import cv2
+import threading
+import functools
 import numpy as np
-import torch
+import xxhash
 from pathlib import Path
+from core.config import settings
+from .model_registry import registry
+from .stage_metrics import STAGE_SECONDS
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 MODEL_PATH = BASE_DIR / "ai_models" / "best.pt"
+CONF_THRESHOLD = 0.7
 
-# ✅ Auto-select device
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# Bump when detect_stenosis output changes (invalidates cached detections)
+DETECT_VERSION = 2
 
-# ✅ Load model once
-yolo_model = YOLO(str(MODEL_PATH))
-yolo_model.to(DEVICE)
+# YOLO_BACKEND -> weights file (ultralytics export naming, next to best.pt)
+BACKEND_SUFFIXES = {
+    "pt": ".pt",
+    "onnx": ".onnx",
+    "torchscript": ".torchscript",
+}
 
-def detect_stenosis(image_bytes):
-    img = cv2.imdecode(
-        np.frombuffer(image_bytes, np.uint8),
-        cv2.IMREAD_COLOR
+
+def model_path(backend=None):
+    return MODEL_PATH.with_suffix(BACKEND_SUFFIXES[backend or settings.YOLO_BACKEND])
+
+
+@functools.cache
+def model_version():
+    # Weights fingerprint: retraining best.pt (or re-exporting) invalidates
+    # cached detections; backend and input size change the boxes slightly.
+    # Hashed on first use, not at import (the file is tens of MB)
+    weights = xxhash.xxh3_64_hexdigest(model_path().read_bytes())
+    return f"{weights}:{settings.YOLO_BACKEND}:{settings.YOLO_IMGSZ}"
+
+
+def export_yolo(backend, imgsz=None):
+    """
+    Export best.pt to `backend` with ultralytics; returns the new path.
+
+    Static input size (YOLO_IMGSZ): exported graphs are specialised to it,
+    and detect_stenosis always predicts at that size.
+    """
+    from ultralytics import YOLO
+
+    exported = YOLO(str(MODEL_PATH)).export(
+        format=backend,
+        imgsz=imgsz or settings.YOLO_IMGSZ,
+        device="cpu",
+        simplify=backend == "onnx",
+    )
+    return Path(exported)
+
+
+def _load_yolo():
+    # ✅ torch / ultralytics are imported here, on first use or warmup
+    import torch
+    from ultralytics import YOLO
+
+    backend = settings.YOLO_BACKEND
+    path = model_path(backend)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"{path} not found; export it with "
+            f"`python -m benchmarks.yolo_backends --export {backend}`"
+        )
+
+    if settings.YOLO_THREADS:
+        torch.set_num_threads(settings.YOLO_THREADS)
+
+    model = YOLO(str(path), task="detect")
+    if backend == "pt":
+        # ✅ Auto-select device (exported backends pick theirs in AutoBackend)
+        model.to("cuda" if torch.cuda.is_available() else "cpu")
+    return model
+
+
+def _limit_onnx_threads(model):
+    # AutoBackend builds its onnxruntime session with default options
+    # (one intra-op thread per core); rebuild it with YOLO_THREADS
+    import onnxruntime
+
+    backend = model.predictor.model
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = settings.YOLO_THREADS
+    options.inter_op_num_threads = 1
+    backend.session = onnxruntime.InferenceSession(
+        str(model_path("onnx")),
+        sess_options=options,
+        providers=backend.session.get_providers(),
     )
 
+
+def _warm_yolo(model):
+    # First predict builds the predictor; pay it here, not on a request
+    size = settings.YOLO_IMGSZ
+    predict(model, np.zeros((size, size, 3), dtype=np.uint8))
+    if settings.YOLO_BACKEND == "onnx" and settings.YOLO_THREADS:
+        _limit_onnx_threads(model)
+    model_version()
+
+
+def predict(model, img):
+    return model(img, conf=CONF_THRESHOLD, imgsz=settings.YOLO_IMGSZ, verbose=False)
+
+
+registry.register("yolo", _load_yolo, _warm_yolo)
+
+# Ultralytics predictors are not thread-safe; pipeline threads share one model
+_predict_lock = threading.Lock()
+
+def detect_stenosis(frame):
+    img = frame.image
+    yolo_model = registry.get("yolo")
+
     # ✅ DO NOT pass device here
-    results = yolo_model(img, conf=0.7)
+    with _predict_lock:
+        with STAGE_SECONDS.time("yolo"):
+            results = predict(yolo_model, img)
 
-    if len(results[0].boxes) == 0:
+    boxes = results[0].boxes
+    if len(boxes) == 0:
         return {"detected": False}
 
-    box = results[0].boxes.xyxy[0].cpu().numpy()
-    conf = float(results[0].boxes.conf[0])
+    # ✅ Every box above CONF_THRESHOLD, most confident first
+    xyxy = boxes.xyxy.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    order = conf.argsort()[::-1]
 
     return {
         "detected": True,
-        "box": box,
-        "confidence": conf,
+        "detections": [
+            {"box": [float(v) for v in xyxy[i]], "confidence": float(conf[i])}
+            for i in order
+        ],
         "shape": img.shape
     }
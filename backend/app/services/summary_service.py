@@ -0,0 +1,130 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from core.response_cache import mark_dirty
+from db.session import track_queries
+
+# Serialises summary refreshes per patient (transaction-scoped advisory
+# lock): without it, two concurrent writers each recompute from their own
+# snapshot and the later commit can overwrite the row with counts that
+# miss the other's rows. Statements after the lock see everything the
+# previous holder committed (READ COMMITTED takes a snapshot per statement).
+_LOCK_SQL = text(
+    "SELECT pg_advisory_xact_lock("
+    "hashtext('patient_summaries'), hashtext(CAST(:patient_id AS text)))"
+)
+
+# Dashboard ETag: committed together with the summary rows, so a reader
+# never sees the new version without them, and it only ever moves forward.
+# The row lock is taken before any patient lock, so it also orders
+# transactions that refresh several patients (no lock-order deadlock).
+_BUMP_DASHBOARD_SQL = text("UPDATE dashboard_version SET version = version + 1 WHERE id")
+
+# Recomputes one patient's row; every lookup is by indexed key, so the cost
+# depends on that patient's studies/images, not on the patient count.
+_REFRESH_SQL = text("""
+    INSERT INTO patient_summaries (
+        patient_id, name, created_at, scans, inferred_scans,
+        decision_status, report_generated, updated_at
+    )
+    SELECT
+        p.id,
+        p.name,
+        COALESCE(p.created_at, now()),
+
+        (SELECT COUNT(*)
+           FROM studies s JOIN images i ON i.study_id = s.id
+          WHERE s.patient_id = p.id),
+
+        (SELECT COUNT(DISTINCT f.image_id)
+           FROM studies s
+           JOIN images i ON i.study_id = s.id
+           JOIN findings f ON f.image_id = i.id
+          WHERE s.patient_id = p.id),
+
+        COALESCE(latest.decision_status, 'pending'),
+        COALESCE(latest.report_generated, false),
+        clock_timestamp()
+
+    FROM patients p
+    LEFT JOIN LATERAL (
+        SELECT
+            d.status AS decision_status,
+            r.study_id IS NOT NULL AS report_generated
+        FROM studies s
+        LEFT JOIN decisions d ON d.study_id = s.id
+        LEFT JOIN reports r ON r.study_id = s.id
+        WHERE s.patient_id = p.id
+        ORDER BY s.created_at DESC
+        LIMIT 1
+    ) latest ON true
+    WHERE p.id = :patient_id
+
+    ON CONFLICT (patient_id) DO UPDATE SET
+        name = EXCLUDED.name,
+        scans = EXCLUDED.scans,
+        inferred_scans = EXCLUDED.inferred_scans,
+        decision_status = EXCLUDED.decision_status,
+        report_generated = EXCLUDED.report_generated,
+        updated_at = EXCLUDED.updated_at
+""")
+
+
+@track_queries
+async def refresh_patient_summary(db: AsyncSession, patient_id):
+    """
+    Bring a patient's dashboard row up to date.
+
+    Runs inside the caller's transaction so the summary commits
+    atomically with the write that changed it; concurrent refreshes of
+    the same patient wait for each other (lock held until commit), and
+    summary writes commit in dashboard version order.
+    """
+    await db.execute(_BUMP_DASHBOARD_SQL)
+    await db.execute(_LOCK_SQL, {"patient_id": patient_id})
+    await db.execute(_REFRESH_SQL, {"patient_id": patient_id})
+    mark_dirty(db, "dashboard")
+
+
+@track_queries
+async def refresh_summary_for_study(db: AsyncSession, study_id):
+    patient_id = (
+        await db.execute(
+            text("SELECT patient_id FROM studies WHERE id = :study_id"),
+            {"study_id": study_id},
+        )
+    ).scalar_one_or_none()
+
+    if patient_id is not None:
+        await refresh_patient_summary(db, patient_id)
+
+
+@track_queries
+async def bump_study_version(db: AsyncSession, study_id):
+    """
+    Mark a study's findings as changed.
+
+    The row lock orders concurrent bumps, and the new version is only
+    visible once the caller commits, together with the findings.
+    """
+    await db.execute(
+        text("UPDATE studies SET version = version + 1 WHERE id = :study_id"),
+        {"study_id": study_id},
+    )
+    mark_dirty(db, "findings-view", str(study_id))
+
+
+@track_queries
+async def study_version(db: AsyncSession, study_id):
+    return (
+        await db.execute(
+            text("SELECT version FROM studies WHERE id = :study_id"),
+            {"study_id": study_id},
+        )
+    ).scalar_one_or_none()
+
+
+@track_queries
+async def dashboard_version(db: AsyncSession):
+    return (
+        await db.execute(text("SELECT version FROM dashboard_version WHERE id"))
+    ).scalar_one_or_none()
@@ -1,13 +1,112 @@
+import os
 import uuid
+import hashlib
+from pathlib import Path
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
 from models.study import Study
 from models.image import Image
+from services.summary_service import refresh_patient_summary
+from db.session import track_queries
 
 
+class UploadTooLargeError(Exception):
+    pass
+
+
+async def stream_upload_to_disk(
+    upload: UploadFile,
+    dest_path: Path,
+    max_bytes: int,
+):
+    """
+    Copy an upload to `dest_path` in fixed-size chunks.
+
+    Memory stays at one chunk regardless of file size; file I/O runs in
+    the threadpool and the content hash is computed as chunks pass
+    through. Writes go to a `.part` file that is renamed on success and
+    removed on any failure. Returns (size, sha256 hex digest).
+    """
+    tmp_path = dest_path.with_name(dest_path.name + ".part")
+    # sha256, not xxhash: the digest is the blob identity shared across patients
+    hasher = hashlib.sha256()
+    size = 0
+
+    f = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while chunk := await upload.read(settings.UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(
+                    f"{upload.filename} exceeds the {max_bytes} byte upload limit"
+                )
+            hasher.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        await run_in_threadpool(tmp_path.unlink, True)
+        raise
+
+    await run_in_threadpool(f.close)
+    await run_in_threadpool(os.replace, tmp_path, dest_path)
+    return size, hasher.hexdigest()
+
+
+def blob_path(content_hash: str, filename: str) -> Path:
+    # Content-addressed layout: blobs/ab/abcdef....png
+    suffix = Path(filename or "").suffix.lower()
+    return (
+        Path(settings.DICOM_STORAGE_PATH) / "blobs"
+        / content_hash[:2] / f"{content_hash}{suffix}"
+    )
+
+
+def _promote_to_blob(tmp_path: Path, dest: Path) -> bool:
+    try:
+        # Already stored -> touch it, so the orphan GC (services/blob_gc.py)
+        # leaves it alone until this upload's rows are committed
+        os.utime(dest)
+    except FileNotFoundError:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, dest)
+        return True
+
+    # ... and drop the duplicate
+    tmp_path.unlink(missing_ok=True)
+    return False
+
+
+async def store_upload(upload: UploadFile, max_bytes: int):
+    """
+    Stream an upload into the content-addressed blob store.
+
+    Returns {"file_path", "content_hash", "size", "created"}; `created`
+    is False when identical content was already stored.
+    """
+    incoming = Path(settings.DICOM_STORAGE_PATH) / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = incoming / f"{uuid.uuid4()}_{Path(upload.filename or '').name}"
+    size, content_hash = await stream_upload_to_disk(upload, tmp_path, max_bytes)
+
+    dest = blob_path(content_hash, upload.filename)
+    created = await run_in_threadpool(_promote_to_blob, tmp_path, dest)
+
+    return {
+        "file_path": str(dest),
+        "content_hash": content_hash,
+        "size": size,
+        "created": created,
+    }
+
+
+@track_queries
 async def create_study_and_images(
     db: AsyncSession,
     patient_id: uuid.UUID,
-    file_paths: list[str],
+    stored_files: list[dict],
 ):
     study = Study(
         id=uuid.uuid4(),
@@ -17,14 +116,17 @@ async def create_study_and_images(
     await db.flush()  # ensures study.id exists
 
     images = []
-    for path in file_paths:
+    for stored in stored_files:
         img = Image(
             id=uuid.uuid4(),
             study_id=study.id,
-            file_path=path,
+            file_path=stored["file_path"],
+            content_hash=stored["content_hash"],
         )
         db.add(img)
         images.append(img)
 
+    await db.flush()
+    await refresh_patient_summary(db, patient_id)
     await db.commit()
     return study, images
@@ -0,0 +1,25 @@
+# app/tests/test_lazy_imports.py
+"""`import main` must not load the model libraries; see benchmarks/startup.py."""
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import LAZY_MODULES
+from conftest import APP_DIR
+
+_PROBE = f"""
+import json, sys
+import main
+print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))
+"""
+
+
+def test_import_main_keeps_model_libraries_lazy():
+    # Fresh interpreter: this test session may already have imported them
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=APP_DIR, env=os.environ.copy(),
+        capture_output=True, text=True, check=True,
+    )
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,24 @@
+# app/tests/test_query_plans.py
+"""Hot queries must be served by an index; see db/plan_check.py."""
+import asyncio
+import os
+
+import pytest
+
+from db.plan_check import HOT_QUERIES, _seq_scans, explain_hot_queries
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URL"),
+    reason="needs a local Postgres at TEST_DATABASE_URL",
+)
+
+
+@pytest.fixture(scope="module")
+def plans():
+    # One event loop for all of them: the engine's pool is bound to it
+    return asyncio.run(explain_hot_queries())
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_no_seq_scan(plans, name):
+    assert sorted(set(_seq_scans(plans[name]))) == []
@@ -6,7 +6,7 @@ import {
 } from 'lucide-react';
 import { Patient, Finding } from '../types';
 import { analyzeMedicalCorrection, refineMedicalTranscript } from '../services/geminiService';
-import { getFindingsView } from '../services/findingsService';
+import { getFindingsView, findingKey } from '../services/findingsService';
 import { jsPDF } from "jspdf";
 
 interface AngiographyViewProps {
@@ -52,16 +52,24 @@ useEffect(() => {
       const findingsView = await getFindingsView(patient.studyId);
 
       const mapped: Finding[] = findingsView.images.map((img) => {
-        const heatmapUrl = img.heatmap_path
-          ? `${base}${normalize(img.heatmap_path)}`
+        // Each entry is one lesion: show its own overlay, not the whole image's
+        const overlayPath = img.overlay_path ?? img.heatmap_path;
+        const heatmapUrl = overlayPath
+          ? `${base}${normalize(overlayPath)}`
           : null;
 
-        const originalUrl = img.image_path
-          ? `${base}${normalize(img.image_path)}`
+        const originalUrl = img.image_preview_path
+          ? `${base}${normalize(img.image_preview_path)}`
           : null;
 
+        const thumbnailPath =
+          img.overlay_thumbnail_path ?? img.heatmap_thumbnail_path ?? img.image_thumbnail_path;
+        const thumbnailUrl = thumbnailPath
+          ? `${base}${normalize(thumbnailPath)}`
+          : undefined;
+
         return {
-          id: img.image_id,
+          id: findingKey(img),
           arteryName: img.artery || 'Unknown',
           confidence: Math.round(img.confidence * 100),
           blockagePercentage: img.blockage_pct,
@@ -70,6 +78,7 @@ useEffect(() => {
           imageUrl: heatmapUrl ?? originalUrl ?? '',
 
           heatmapUrl,
+          thumbnailUrl,
           originalImageUrl: originalUrl,
           isFlagged: img.blockage_pct > 50,
         };
@@ -469,7 +478,7 @@ useEffect(() => {
                       : 'border-slate-100 opacity-60 hover:opacity-100 hover:border-blue-200'
                   }`}
                 >
-                  <img src={f.imageUrl} className="w-full h-full object-cover" alt="" />
+                  <img src={f.thumbnailUrl ?? f.imageUrl} className="w-full h-full object-cover" alt="" loading="lazy" />
                   {f.isFlagged && <div className="absolute top-1 right-1 w-2.5 h-2.5 bg-red-500 rounded-full shadow-sm border border-white"></div>}
                   
                   {/* Delete Button on Hover */}
@@ -8,7 +8,7 @@ import { refineMedicalTranscript } from '../services/geminiService';
 import { createPatient } from '../services/patientService';
 import { uploadBatch } from '../services/uploadService';
 import { runInference } from '../services/inferenceService';
-import { getFindingsView } from '../services/findingsService';
+import { getFindingsView, findingKey } from '../services/findingsService';
 
 interface NewPatientPageProps {
   onBack: () => void;
@@ -143,15 +143,20 @@ const NewPatientPage: React.FC<NewPatientPageProps> = ({ onBack, onSave }) => {
                     // Map backend findings to frontend Finding[]
                     const base = (import.meta.env && (import.meta.env.VITE_API_BASE as string)) || 'http://localhost:8000';
                     const normalize = (p: string) => p.replace(/\\/g, '/');
-                    const mappedFindings: any[] = findingsView.images.map((img) => ({
-                        id: img.image_id,
-                        arteryName: img.artery,
-                        confidence: img.confidence,
-                        blockagePercentage: img.blockage_pct,
-                        imageUrl: img.image_path ? `${base}${normalize(img.image_path)}` : '',
-                        heatmapUrl: img.heatmap_path ? `${base}${normalize(img.heatmap_path)}` : null,
-                        isFlagged: img.blockage_pct > 50,
-                    }));
+                    const mappedFindings: any[] = findingsView.images.map((img) => {
+                        // One entry per lesion, each with its own overlay
+                        const heatmapThumb = img.overlay_thumbnail_path ?? img.heatmap_thumbnail_path;
+                        return {
+                            id: findingKey(img),
+                            arteryName: img.artery,
+                            confidence: img.confidence,
+                            blockagePercentage: img.blockage_pct,
+                            // Grid tiles: thumbnails only
+                            imageUrl: img.image_thumbnail_path ? `${base}${normalize(img.image_thumbnail_path)}` : '',
+                            heatmapUrl: heatmapThumb ? `${base}${normalize(heatmapThumb)}` : null,
+                            isFlagged: img.blockage_pct > 50,
+                        };
+                    });
 
                     mappedFindingsLocal = mappedFindings;
                     setBackendFindings(mappedFindings);
@@ -1,15 +1,26 @@
 export type FindingsView = {
   study_id: string;
+  // One entry per lesion: key on `${image_id}:${lesion_index}`
   images: Array<{
     image_id: string;
+    lesion_index: number;
     artery: string;
     blockage_pct: number;
     confidence: number;
     image_path: string | null;
+    image_preview_path: string | null;
+    image_thumbnail_path: string | null;
     heatmap_path: string | null;
+    heatmap_thumbnail_path: string | null;
+    overlay_path: string | null;            // this lesion only
+    overlay_thumbnail_path: string | null;
+    diameter_profile: number[] | null;
   }>;
 };
 
+export const findingKey = (img: { image_id: string; lesion_index: number }) =>
+  `${img.image_id}:${img.lesion_index}`;
+
 export async function getFindingsView(studyId: string): Promise<FindingsView> {
   const base = (import.meta.env && (import.meta.env.VITE_API_BASE as string)) || 'http://localhost:8000';
   const url = `${base}/studies/${encodeURIComponent(studyId)}/findings-view`;
@@ -1,10 +1,43 @@
-export async function runInference(studyId: string): Promise<{ study_id: string; status: string }> {
-  const base = (import.meta.env && (import.meta.env.VITE_API_BASE as string)) || 'http://localhost:8000';
-  const url = `${base}/studies/${encodeURIComponent(studyId)}/run-inference`;
+export type InferenceJob = {
+  job_id: string;
+  study_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  progress: { total: number; processed: number };
+  images: Record<string, string>;
+  error: string | null;
+};
+
+const apiBase = () => (import.meta.env && (import.meta.env.VITE_API_BASE as string)) || 'http://localhost:8000';
+
+export async function getJob(jobId: string): Promise<InferenceJob> {
+  const url = `${apiBase()}/jobs/${encodeURIComponent(jobId)}`;
+  const res = await fetch(url);
+  if (!res.ok) {
+    const txt = await res.text().catch(() => '');
+    throw new Error(`getJob failed: ${res.status} ${res.statusText} ${txt}`);
+  }
+  return (await res.json()) as InferenceJob;
+}
+
+// Enqueues inference and resolves once the background job has finished.
+export async function runInference(
+  studyId: string,
+  onProgress?: (job: InferenceJob) => void,
+  pollMs = 1000,
+): Promise<InferenceJob> {
+  const url = `${apiBase()}/studies/${encodeURIComponent(studyId)}/run-inference`;
   const res = await fetch(url, { method: 'POST' });
   if (!res.ok) {
     const txt = await res.text().catch(() => '');
     throw new Error(`runInference failed: ${res.status} ${res.statusText} ${txt}`);
   }
-  return (await res.json()) as { study_id: string; status: string };
+  const { job_id } = (await res.json()) as { study_id: string; job_id: string; status: string };
+
+  while (true) {
+    const job = await getJob(job_id);
+    onProgress?.(job);
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed') throw new Error(`Inference job failed: ${job.error ?? 'unknown error'}`);
+    await new Promise((resolve) => setTimeout(resolve, pollMs));
+  }
 }
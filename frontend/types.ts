@@ -24,6 +24,7 @@ export interface Finding {
   blockagePercentage: number;
   imageUrl: string;
   heatmapUrl?: string;
+  thumbnailUrl?: string; // small image for grids / film strips
   isFlagged: boolean;
   notes?: string;
   excludedFromReport?: boolean; // If true, this finding won't appear in the PDF report